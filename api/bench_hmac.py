@@ -0,0 +1,47 @@
+"""
+Microbenchmark for license signature checks.
+
+Compares the original per-request hmac.new(...) construction and string
+comparison against the shipped check: license_service.sign_license_message
+(a copy of the precomputed HMAC prototype) and hmac.compare_digest, as in
+license_service._verify_license_key_uncached.
+
+Usage: python api/bench_hmac.py [iterations]
+"""
+import hashlib
+import hmac
+import sys
+import time
+import timeit
+
+from license_service import LICENSE_SECRET, sign_license_message
+
+MESSAGE = f"GEAR-L-{int(time.time())}"
+SIGNATURE = sign_license_message(MESSAGE)
+
+def check_before():
+    expected_sig = hmac.new(
+        LICENSE_SECRET.encode(), 
+        MESSAGE.encode(), 
+        hashlib.sha256
+    ).hexdigest()[:10]
+    return not (SIGNATURE != expected_sig)
+
+def check_after():
+    expected_sig = sign_license_message(MESSAGE)
+    return hmac.compare_digest(SIGNATURE.encode(), expected_sig.encode())
+
+def run(iterations):
+    results = {}
+    for name, func in (("before", check_before), ("after", check_after)):
+        # Best of 5 runs to reduce scheduler noise
+        best = min(timeit.repeat(func, number=iterations, repeat=5))
+        results[name] = best / iterations * 1e9
+    return results
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    results = run(iterations)
+    for name, ns in results.items():
+        print(f"{name:>6}: {ns:8.1f} ns/verify")
+    print(f"speedup: {results['before'] / results['after']:.2f}x")
@@ -0,0 +1,69 @@
+"""
+Cost of the rate-limit checks on each /verify.
+
+Every /verify acquires the client and the key limiter. With shared
+limits that is two flocks on files all workers contend for, so this
+runs that pair from 1, 2, 4, ... processes at once on distinct keys and
+reports aggregate checks per second and the time per check, against the
+in-process TokenBucketLimiter. Compare the process counts against
+os.cpu_count(): past it, processes only take turns on the CPUs.
+
+Usage: python api/bench_rate_limit.py [checks_per_process] [max_processes]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from rate_limit import SharedTokenBucketLimiter, TokenBucketLimiter
+
+def make_limiters(directory):
+    if directory is None:
+        return TokenBucketLimiter(1e9, 1e9), TokenBucketLimiter(1e9, 1e9)
+    return (SharedTokenBucketLimiter(os.path.join(directory, "client-buckets"), 1e9, 1e9),
+            SharedTokenBucketLimiter(os.path.join(directory, "key-buckets"), 1e9, 1e9))
+
+def worker(directory, worker_id, checks, start, results):
+    client_limiter, key_limiter = make_limiters(directory)
+    client = f"10.0.{worker_id}.1"
+    keys = [f"GEAR-L-{1700000000 + worker_id}-{i:010d}" for i in range(1000)]
+    start.wait()
+    started = time.perf_counter()
+    for i in range(checks):
+        client_limiter.acquire(client)
+        key_limiter.acquire(keys[i % len(keys)])
+    results.put(time.perf_counter() - started)
+
+def run(shared, processes, checks):
+    directory = tempfile.mkdtemp(prefix="license-buckets-") if shared else None
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=worker, args=(directory, i, checks, start, results))
+               for i in range(processes)]
+    for process in workers:
+        process.start()
+    time.sleep(0.5)
+    started = time.perf_counter()
+    start.set()
+    durations = [results.get() for _ in workers]
+    wall = time.perf_counter() - started
+    for process in workers:
+        process.join()
+    return {
+        "checksPerSecond": round(processes * checks / wall),
+        "microsPerCheck": round(sum(durations) / (processes * checks) * 1e6, 2)
+    }
+
+if __name__ == "__main__":
+    checks = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    max_processes = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    print(f"CPUs: {os.cpu_count()}")
+    processes = 1
+    while processes <= max_processes:
+        for shared in (False, True):
+            stats = run(shared, processes, checks)
+            name = "shared" if shared else "local"
+            print(f"{processes} processes {name:>6}: {stats['checksPerSecond']:>9} /verify checks/s  "
+                  f"{stats['microsPerCheck']:>6.2f} us per check")
+        processes *= 2
@@ -0,0 +1,41 @@
+"""
+Memory and lookup cost of the revocation Bloom filter.
+
+Usage: python api/bench_revocation.py [revoked_keys]
+"""
+import sys
+import time
+
+from license_service import REVOCATION_FP_RATE, RevocationFilter
+
+def make_keys(count, type_code="M", start=1700000000):
+    # Signatures do not matter to the filter, only key uniqueness
+    return [f"GEAR-{type_code}-{start + i}-{i:010x}" for i in range(count)]
+
+def run(count):
+    revoked = make_keys(count)
+    probes = make_keys(100000, type_code="L")
+    
+    revocation = RevocationFilter(count, REVOCATION_FP_RATE)
+    started = time.perf_counter()
+    revocation.rebuild(revoked)
+    build_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    false_positives = sum(revocation.might_contain(key) for key in probes)
+    probe_seconds = time.perf_counter() - started
+    
+    return {
+        "revokedKeys": count,
+        "filterBytes": revocation.memory_bytes(),
+        "keyListBytes": sum(sys.getsizeof(key) for key in revoked),
+        "hashes": revocation.num_hashes,
+        "buildSeconds": round(build_seconds, 3),
+        "lookupMicros": round(probe_seconds / len(probes) * 1e6, 3),
+        "falsePositiveRate": false_positives / len(probes)
+    }
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for name, value in run(count).items():
+        print(f"{name}: {value}")
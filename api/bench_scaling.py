@@ -0,0 +1,92 @@
+"""
+Multi-worker scaling benchmark for /verify.
+
+For each worker count, starts uvicorn with that many workers sharing one
+SQLite database and drives it from several bench_verify.py client
+processes at once (a single Python client saturates well before the
+server does). Reports aggregate throughput and efficiency relative to
+perfect linear scaling, and optionally writes JSON.
+
+Usage: python api/bench_scaling.py --workers 1 2 4 8 --clients 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Shared by the server and all client processes
+os.environ.setdefault("LICENSE_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="license-scaling-"), "licenses.db"))
+
+from bench_verify import start_uvicorn, wait_for_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def drive_clients(base_url, clients, requests, concurrency):
+    outputs = []
+    procs = []
+    for index in range(clients):
+        output = os.path.join(tempfile.mkdtemp(prefix="license-client-"), "result.json")
+        outputs.append(output)
+        procs.append(subprocess.Popen([
+            sys.executable, os.path.join(HERE, "bench_verify.py"),
+            "--mode", "uvicorn", "--base-url", base_url,
+            "--endpoints", "/verify",
+            "--requests", str(requests),
+            "--concurrency", str(concurrency),
+            "--seed", str(1000 + index),
+            "--json", output
+        ], stdout=subprocess.DEVNULL))
+
+    for proc in procs:
+        if proc.wait() != 0:
+            raise RuntimeError("benchmark client failed")
+
+    throughput = 0.0
+    p99 = 0.0
+    for output in outputs:
+        with open(output) as f:
+            stats = json.load(f)["endpoints"]["/verify"]
+        throughput += stats["throughput"]
+        p99 = max(p99, stats["p99_ms"])
+    return {"throughput": round(throughput, 1), "p99_ms": p99}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure /verify scaling across uvicorn workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--requests", type=int, default=5000, help="requests per client")
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per client")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    cpus = os.cpu_count() or 1
+    if max(args.workers) > cpus:
+        print(f"Note: only {cpus} CPUs; worker counts above that (and the client processes) share cores, "
+              f"so they cannot scale linearly")
+
+    results = []
+    for workers in args.workers:
+        server, base_url = start_uvicorn(workers)
+        try:
+            wait_for_server(base_url)
+            stats = drive_clients(base_url, args.clients, args.requests, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+        stats["workers"] = workers
+        results.append(stats)
+
+    base = results[0]["throughput"] / results[0]["workers"]
+    for stats in results:
+        stats["efficiency"] = round(stats["throughput"] / (base * stats["workers"]), 3)
+        print(f"{stats['workers']:>3} workers  {stats['throughput']:>10.1f} req/s  "
+              f"p99 {stats['p99_ms']:.2f}ms  efficiency {stats['efficiency']:.0%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"clients": args.clients, "cpus": cpus, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
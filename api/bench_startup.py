@@ -0,0 +1,137 @@
+"""
+Cold start benchmark for the license API.
+
+For each app module, measures
+  - import time: the cumulative time `python -X importtime` reports for
+    importing the module on its own
+  - first /verify: wall time from launching uvicorn until the first
+    POST /verify returns, polling as fast as connections are refused
+  - first /metrics: the next request to a route outside /verify, which
+    lean_app.py answers by importing the FastAPI app
+
+Each run starts a fresh process on a throwaway database and the median
+of --runs is reported. Pass --baseline to fail when first /verify is
+slower than a previous --json result beyond --tolerance.
+
+Usage:
+    python api/bench_startup.py --runs 5
+    python api/bench_startup.py --apps lean_app --json startup.json --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from bench_verify import free_port
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def import_seconds(module):
+    """
+    Cumulative import time of module in a fresh interpreter
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, env=bench_env(), capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        _, _, cumulative, name = [part.strip() for part in line.replace(":", "|", 1).split("|")]
+        if name == module:
+            return int(cumulative) / 1e6
+    raise RuntimeError(f"no importtime line for {module}")
+
+def bench_env():
+    env = os.environ.copy()
+    env["LICENSE_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="license-startup-"), "licenses.db")
+    env.setdefault("LICENSE_CLIENT_RATE", "0")
+    env.setdefault("LICENSE_KEY_RATE", "0")
+    return env
+
+def first_response(client, method, url, deadline, **kwargs):
+    while time.monotonic() < deadline:
+        try:
+            return client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            time.sleep(0.002)
+    raise RuntimeError(f"no response from {url}")
+
+def cold_start(module, timeout=30):
+    """
+    (seconds to first /verify, seconds for the following /metrics)
+    """
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=HERE, env=bench_env()
+    )
+    try:
+        with httpx.Client(base_url=base_url) as client:
+            response = first_response(client, "POST", "/verify", started + timeout,
+                                      json={"licenseKey": "GEAR-L-1700000000-0000000000"})
+            response.raise_for_status()
+            verify_seconds = time.monotonic() - started
+
+            metrics_started = time.monotonic()
+            client.get("/metrics").raise_for_status()
+            metrics_seconds = time.monotonic() - metrics_started
+        return verify_seconds, metrics_seconds
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+def measure(module, runs):
+    imports = [import_seconds(module) for _ in range(runs)]
+    starts = [cold_start(module) for _ in range(runs)]
+    return {
+        "import_ms": round(statistics.median(imports) * 1000, 1),
+        "first_verify_ms": round(statistics.median(verify for verify, _ in starts) * 1000, 1),
+        "first_metrics_ms": round(statistics.median(metrics for _, metrics in starts) * 1000, 1)
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure license API cold start")
+    parser.add_argument("--apps", nargs="+", default=["verify_license", "lean_app"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {"python": sys.version.split()[0], "runs": args.runs, "apps": {}}
+    for module in args.apps:
+        stats = measure(module, args.runs)
+        results["apps"][module] = stats
+        print(f"{module:<16} import {stats['import_ms']:>7.1f}ms  first /verify {stats['first_verify_ms']:>7.1f}ms  "
+              f"then /metrics {stats['first_metrics_ms']:>7.1f}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = []
+        for module, stats in results["apps"].items():
+            previous = baseline.get("apps", {}).get(module)
+            if previous and stats["first_verify_ms"] > previous["first_verify_ms"] * (1 + args.tolerance):
+                regressions.append(f"{module} first /verify {stats['first_verify_ms']}ms > "
+                                   f"baseline {previous['first_verify_ms']}ms")
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+Load test for the license API.
+
+Drives /verify, /verify/batch and /generate either in-process through an
+ASGI client or against a local uvicorn server, using a realistic mix of
+valid, expired, forged and malformed keys. Prints a summary and writes
+machine-readable JSON; pass --baseline to fail when throughput or p99
+latency regresses beyond --tolerance.
+
+Usage:
+    python api/bench_verify.py --mode asgi --requests 20000 --concurrency 64
+    python api/bench_verify.py --mode uvicorn --json results.json --baseline baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Each run gets a throwaway database unless one is given explicitly
+os.environ.setdefault("LICENSE_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="license-bench-"), "licenses.db"))
+
+# All benchmark traffic comes from one client, so rate limiting is off by default
+for rate_setting in ("LICENSE_CLIENT_RATE", "LICENSE_KEY_RATE", "LICENSE_GENERATE_RATE"):
+    os.environ.setdefault(rate_setting, "0")
+
+import httpx
+
+import verify_license
+
+DEFAULT_MIX = {
+    "lifetime": 0.45,
+    "monthly": 0.35,
+    "expired": 0.08,
+    "bad_signature": 0.07,
+    "malformed": 0.05
+}
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3)
+    }
+
+def signed_key(type_code, timestamp):
+    message = f"GEAR-{type_code}-{timestamp}"
+    return f"{message}-{verify_license.sign_license_message(message)}"
+
+async def build_key_pool(client, size, mix, rng):
+    """
+    Build a shuffled key mix; /generate only issues one key per type per
+    second, so further valid keys are signed the same way at spread-out
+    purchase times
+    """
+    pool = []
+    now = int(time.time())
+    day = 24 * 60 * 60
+    for kind in ("lifetime", "monthly"):
+        response = await client.get(f"/generate/{kind}")
+        response.raise_for_status()
+        pool.append((kind, response.json()["license_key"]))
+    
+    for kind, share in mix.items():
+        for _ in range(max(1, int(size * share))):
+            if kind == "lifetime":
+                key = signed_key("L", now - rng.randint(0, 1000 * day))
+            elif kind == "monthly":
+                key = signed_key("M", now - rng.randint(0, 29 * day))
+            elif kind == "expired":
+                key = signed_key("M", now - rng.randint(31 * day, 400 * day))
+            elif kind == "bad_signature":
+                message = f"GEAR-{rng.choice('ML')}-{now - rng.randint(0, 29 * day)}"
+                key = f"{message}-{''.join(rng.choice('0123456789abcdef') for _ in range(10))}"
+            else:
+                key = rng.choice([
+                    "", "GEAR", "GEAR-X-1-2", "GEAR-M-notatime-abcdef0123",
+                    "NOPE-L-1700000000-abcdef0123", "GEAR-L-1700000000"
+                ]) + str(rng.randint(0, 9999))
+            pool.append((kind, key))
+    rng.shuffle(pool)
+    return pool
+
+async def drive(client, endpoint, total, concurrency, pool, batch_size, rng):
+    latencies = []
+    counter = iter(range(total))
+
+    def next_request():
+        if endpoint == "/verify":
+            return "POST", {"licenseKey": rng.choice(pool)[1]}
+        if endpoint == "/verify/batch":
+            return "POST", {"licenseKeys": [rng.choice(pool)[1] for _ in range(batch_size)]}
+        return "GET", None
+
+    async def worker():
+        for _ in counter:
+            method, body = next_request()
+            url = endpoint if endpoint != "/generate" else f"/generate/{rng.choice(['monthly', 'lifetime'])}"
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 500:
+                raise RuntimeError(f"{url} returned {response.status_code}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started)
+
+async def run_against(client, args):
+    rng = random.Random(args.seed)
+    pool = await build_key_pool(client, args.pool_size, DEFAULT_MIX, rng)
+
+    results = {}
+    for endpoint in args.endpoints:
+        total = args.requests if endpoint != "/verify/batch" else max(1, args.requests // args.batch_size)
+        # Warm caches and connections before measuring
+        await drive(client, endpoint, min(total, 200), args.concurrency, pool, args.batch_size, rng)
+        results[endpoint] = await drive(client, endpoint, total, args.concurrency, pool, args.batch_size, rng)
+    return results
+
+async def run_asgi(args):
+    app = verify_license.app
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run_against(client, args)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_uvicorn(workers):
+    """
+    Start verify_license:app under uvicorn and return (process, base_url)
+    """
+    port = free_port()
+    env = os.environ.copy()
+    env["LICENSE_WORKERS"] = str(workers)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "verify_license:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env
+    )
+    return server, f"http://127.0.0.1:{port}"
+
+def wait_for_server(base_url, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(base_url + "/")
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+async def run_remote(args, base_url):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        return await run_against(client, args)
+
+async def run_uvicorn(args):
+    if args.base_url:
+        return await run_remote(args, args.base_url)
+    
+    server, base_url = start_uvicorn(args.workers)
+    try:
+        wait_for_server(base_url)
+        return await run_remote(args, base_url)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+def compare(results, baseline, tolerance):
+    """
+    Return a list of human-readable regressions against a baseline run
+    """
+    regressions = []
+    for endpoint, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if previous is None:
+            continue
+        if current["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{endpoint} throughput {current['throughput']} < baseline {previous['throughput']}")
+        if current["p99_ms"] > previous["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{endpoint} p99 {current['p99_ms']}ms > baseline {previous['p99_ms']}ms")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the license API")
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (uvicorn mode only)")
+    parser.add_argument("--base-url", help="drive an already running server instead of starting one")
+    parser.add_argument("--endpoints", nargs="+", default=["/verify", "/verify/batch", "/generate"])
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=2000, help="distinct keys in the mix")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    runner = run_asgi if args.mode == "asgi" else run_uvicorn
+    endpoints = asyncio.run(runner(args))
+
+    results = {
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "workers": args.workers if args.mode == "uvicorn" else 1,
+        "seed": args.seed,
+        "mix": DEFAULT_MIX,
+        "python": sys.version.split()[0],
+        "endpoints": endpoints
+    }
+
+    for endpoint, stats in endpoints.items():
+        print(f"{endpoint:<14} {stats['throughput']:>10.1f} req/s  "
+              f"p50 {stats['p50_ms']:.2f}ms  p95 {stats['p95_ms']:.2f}ms  p99 {stats['p99_ms']:.2f}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""
+The license service reads its settings when it is imported, so point
+every API test at a throwaway database with the client limit off before
+any test module imports it.
+"""
+import os
+import tempfile
+
+os.environ["LICENSE_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="license-test-"), "licenses.db")
+os.environ["LICENSE_CLIENT_RATE"] = "0"
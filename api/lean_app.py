@@ -0,0 +1,171 @@
+"""
+Fast-starting entry point for the license API.
+
+    uvicorn lean_app:app
+
+Serves POST /verify (and CORS preflights) as a bare ASGI app on top of
+license_service.py, so the process is ready without importing FastAPI
+and pydantic or building the routes and OpenAPI models, which is most of
+verify_license.py's start-up time. Responses match the FastAPI app's.
+
+Every other request, and any /verify request the fast path does not
+handle (a body that fails validation, a cookie-bearing CORS request,
+...), is passed to verify_license.app, imported in a worker thread the
+first time it is needed. Both apps share the store, caches, rate limits
+and metrics in license_service.
+"""
+import asyncio
+import importlib
+import json
+import time
+
+import license_service
+from license_service import client_limiter, key_is_plausible, key_limiter, metrics, verify
+
+# Matches the CORSMiddleware settings in verify_license.py
+CORS_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+CORS_MAX_AGE = "600"
+
+_full_app = None
+
+async def full_app():
+    """
+    verify_license.app, imported off the event loop on first use
+    """
+    global _full_app
+    if _full_app is None:
+        module = await asyncio.to_thread(importlib.import_module, "verify_license")
+        _full_app = module.app
+    return _full_app
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+
+    if scope["type"] == "http":
+        headers = dict(scope["headers"])
+        if scope["method"] == "OPTIONS" and b"origin" in headers and b"access-control-request-method" in headers:
+            if await preflight(headers, send):
+                return
+        elif scope["method"] == "POST" and scope["path"] == "/verify" and b"cookie" not in headers:
+            body = await read_body(receive)
+            if await verify_fast(scope, headers, body, send):
+                return
+            receive = replay_body(body, receive)
+
+    await (await full_app())(scope, receive, send)
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await license_service.start()
+            except Exception as e:
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await license_service.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+def replay_body(body, receive):
+    """
+    A receive callable that yields the already-read body first
+    """
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def replay():
+        return pending.pop() if pending else await receive()
+    return replay
+
+async def respond(send, status, body, content_type, extra_headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-length", str(len(body)).encode()),
+            (b"content-type", content_type),
+            *extra_headers
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+def render_json(content):
+    # Same encoding as Starlette's JSONResponse
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+async def preflight(headers, send):
+    """
+    Answer a CORS preflight the way CORSMiddleware does for
+    allow_origins=["*"], allow_credentials=True and all methods and headers
+    """
+    started = time.perf_counter()
+    if headers[b"access-control-request-method"].decode("latin-1") not in CORS_METHODS:
+        return False
+
+    response_headers = [
+        (b"vary", b"Origin"),
+        (b"access-control-allow-methods", ", ".join(CORS_METHODS).encode()),
+        (b"access-control-max-age", CORS_MAX_AGE.encode()),
+        (b"access-control-allow-credentials", b"true"),
+        (b"access-control-allow-origin", headers[b"origin"])
+    ]
+    if b"access-control-request-headers" in headers:
+        response_headers.append((b"access-control-allow-headers", headers[b"access-control-request-headers"]))
+    await respond(send, 200, b"OK", b"text/plain; charset=utf-8", response_headers)
+    metrics.observe_request("OPTIONS", "unmatched", 200, time.perf_counter() - started)
+    return True
+
+def parse_verify_body(headers, body):
+    """
+    The license key from a well-formed JSON body, or None to let FastAPI
+    produce its own error response
+    """
+    content_type = headers.get(b"content-type", b"application/json").split(b";")[0].strip().lower()
+    if content_type != b"application/json":
+        return None
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get("licenseKey"), str):
+        return None
+    return payload["licenseKey"]
+
+async def verify_fast(scope, headers, body, send):
+    started = time.perf_counter()
+    key = parse_verify_body(headers, body)
+    if key is None:
+        return False
+
+    extra_headers = []
+    if b"origin" in headers:
+        extra_headers += [(b"access-control-allow-origin", b"*"), (b"access-control-allow-credentials", b"true")]
+
+    client = scope.get("client")
+    limits = [(client_limiter, client[0] if client else "unknown")]
+    if key_is_plausible(key):
+        limits.append((key_limiter, key))
+    for limiter, limit_key in limits:
+        allowed, retry_after = limiter.acquire(limit_key)
+        if not allowed:
+            # Same body and header as the HTTPException raised by enforce_rate_limit
+            await respond(send, 429, render_json({"detail": "Too many requests"}), b"application/json",
+                          [(b"retry-after", str(retry_after).encode()), *extra_headers])
+            metrics.observe_request("POST", "/verify", 429, time.perf_counter() - started)
+            return True
+
+    await respond(send, 200, render_json(await verify(key)), b"application/json", extra_headers)
+    metrics.observe_request("POST", "/verify", 200, time.perf_counter() - started)
+    return True
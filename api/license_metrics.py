@@ -0,0 +1,93 @@
+import bisect
+import threading
+from collections import defaultdict
+
+# Latency bucket upper bounds in seconds (Prometheus client defaults, finer at the low end)
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+class LicenseMetrics:
+    """
+    Request latency histograms and verification outcome counters,
+    rendered in the Prometheus text exposition format
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # (method, route, status) -> [bucket counts..., +Inf count], sum
+        self._latency_counts = {}
+        self._latency_sums = defaultdict(float)
+        self._results = defaultdict(int)
+        self._invalid_reasons = defaultdict(int)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        labels = (method, route, str(status))
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts = self._latency_counts.get(labels)
+            if counts is None:
+                counts = self._latency_counts[labels] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._latency_sums[labels] += seconds
+
+    def observe_result(self, valid: bool, message: str):
+        if valid:
+            outcome = "valid"
+        elif message == "License has expired":
+            outcome = "expired"
+        else:
+            outcome = "invalid"
+
+        with self._lock:
+            self._results[outcome] += 1
+            if outcome == "invalid":
+                # Drop exception details so the label set stays bounded
+                reason = (message or "unknown").split(":")[0]
+                self._invalid_reasons[reason] += 1
+
+    def render(self, cache_stats=None, revoked_keys=None) -> str:
+        lines = []
+        with self._lock:
+            lines.append("# HELP license_http_request_duration_seconds Request latency by route")
+            lines.append("# TYPE license_http_request_duration_seconds histogram")
+            for (method, route, status), counts in sorted(self._latency_counts.items()):
+                labels = _labels(method=method, route=route, status=status)
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f'license_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                cumulative += counts[-1]
+                lines.append(f'license_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f"license_http_request_duration_seconds_sum{{{labels}}} {self._latency_sums[(method, route, status)]}")
+                lines.append(f"license_http_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+            lines.append("# HELP license_verifications_total License verification outcomes")
+            lines.append("# TYPE license_verifications_total counter")
+            for outcome in ("valid", "invalid", "expired"):
+                lines.append(f'license_verifications_total{{{_labels(result=outcome)}}} {self._results[outcome]}')
+
+            lines.append("# HELP license_invalid_verifications_total Invalid verifications by reason")
+            lines.append("# TYPE license_invalid_verifications_total counter")
+            for reason, count in sorted(self._invalid_reasons.items()):
+                lines.append(f"license_invalid_verifications_total{{{_labels(reason=reason)}}} {count}")
+
+        if cache_stats is not None:
+            for name in ("hits", "misses", "evictions"):
+                lines.append(f"# TYPE license_cache_{name}_total counter")
+                lines.append(f"license_cache_{name}_total {cache_stats[name]}")
+            lines.append("# TYPE license_cache_entries gauge")
+            lines.append(f"license_cache_entries {cache_stats['size']}")
+
+        if revoked_keys is not None:
+            lines.append("# TYPE license_revocation_filter_keys gauge")
+            lines.append(f"license_revocation_filter_keys {revoked_keys}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,458 @@
+"""
+License verification core shared by the FastAPI app (verify_license.py)
+and the lean /verify entry point (lean_app.py).
+
+Nothing here imports FastAPI or pydantic, so a process that only answers
+/verify can start without paying for them.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import math
+import multiprocessing
+import time
+import os
+from collections import OrderedDict
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+from license_metrics import LicenseMetrics
+from license_store import LicenseStore
+from rate_limit import SharedTokenBucketLimiter, TokenBucketLimiter
+
+logger = logging.getLogger(__name__)
+
+_background_tasks = []
+
+async def start():
+    """
+    Open the store, load revocations and start following the revocation
+    log and flushing activation counts
+    """
+    await license_store.open()
+    # Read the log position first so revocations racing the rebuild are replayed
+    last_id = await license_store.last_revocation_id()
+    revocation_filter.rebuild(await license_store.revoked_keys())
+    _background_tasks.append(asyncio.create_task(sync_revocations(last_id)))
+    _background_tasks.append(asyncio.create_task(flush_activations()))
+
+async def stop():
+    while _background_tasks:
+        _background_tasks.pop().cancel()
+    await license_store.flush_activations()
+    await license_store.close()
+
+async def sync_revocations(last_id: int):
+    """
+    Poll the shared revocation log so revocations made by other worker
+    processes reach this worker's filter within REVOCATION_SYNC_SECONDS
+    """
+    while True:
+        await asyncio.sleep(REVOCATION_SYNC_SECONDS)
+        try:
+            keys, last_id = await license_store.revocations_since(last_id)
+        except Exception:
+            logger.exception("Revocation sync failed")
+            continue
+        for key in keys:
+            revocation_filter.add(key)
+
+async def flush_activations():
+    """
+    Write buffered activation counts every ACTIVATION_FLUSH_SECONDS; a
+    crash loses at most that much of the counts
+    """
+    while True:
+        await asyncio.sleep(ACTIVATION_FLUSH_SECONDS)
+        try:
+            await license_store.flush_activations()
+        except Exception:
+            logger.exception("Activation flush failed")
+
+metrics = LicenseMetrics()
+
+# Would be stored in a database in production
+LICENSE_SECRET = os.environ.get("LICENSE_SECRET", "your-secret-key-here")
+
+# Keyed HMAC state built once at startup; copied for every signature
+_HMAC_PROTOTYPE = hmac.new(LICENSE_SECRET.encode(), digestmod=hashlib.sha256)
+
+def _b64url_decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+# Offline tokens are signed with Ed25519 so the extension can check them
+# with the public key alone. LICENSE_TOKEN_SIGNING_KEY is a base64url
+# 32-byte seed; by default one is derived from LICENSE_SECRET so every
+# worker signs with the same key.
+_TOKEN_SIGNING_SEED = (
+    _b64url_decode(os.environ["LICENSE_TOKEN_SIGNING_KEY"]) if os.environ.get("LICENSE_TOKEN_SIGNING_KEY")
+    else hmac.new(LICENSE_SECRET.encode(), b"offline-token-ed25519", hashlib.sha256).digest()
+)
+_TOKEN_SIGNING_KEY = Ed25519PrivateKey.from_private_bytes(_TOKEN_SIGNING_SEED)
+_TOKEN_PUBLIC_KEY = _TOKEN_SIGNING_KEY.public_key()
+
+def token_public_key() -> str:
+    """
+    The base64url raw public key to embed in the extension (license.js)
+    """
+    return _b64url_encode(_TOKEN_PUBLIC_KEY.public_bytes(Encoding.Raw, PublicFormat.Raw))
+
+# How long an offline token may be trusted before the client must re-verify
+TOKEN_TTL_SECONDS = int(os.environ.get("LICENSE_TOKEN_TTL", str(7 * 24 * 60 * 60)))
+TOKEN_VERSION = "v2"
+
+def sign_license_message(message: str) -> str:
+    """
+    Return the 10-character signature for a PREFIX-TYPE-TIMESTAMP message
+    """
+    mac = _HMAC_PROTOTYPE.copy()
+    mac.update(message.encode())
+    return mac.hexdigest()[:10]
+
+# Maximum number of keys accepted by a single /verify/batch request
+MAX_BATCH_SIZE = int(os.environ.get("LICENSE_MAX_BATCH_SIZE", "500"))
+
+# Verification result cache settings (set LICENSE_CACHE_SIZE=0 to disable)
+CACHE_MAX_ENTRIES = int(os.environ.get("LICENSE_CACHE_SIZE", "10000"))
+CACHE_TTL_SECONDS = int(os.environ.get("LICENSE_CACHE_TTL", "300"))
+
+# License database; point LICENSE_DB_PATH at a temp file in tests
+LICENSE_DB_PATH = os.environ.get("LICENSE_DB_PATH", "licenses.db")
+LICENSE_DB_POOL_SIZE = int(os.environ.get("LICENSE_DB_POOL_SIZE", "4"))
+
+# Token required by the admin revocation endpoint; unset disables it
+ADMIN_TOKEN = os.environ.get("LICENSE_ADMIN_TOKEN")
+
+license_store = LicenseStore(LICENSE_DB_PATH, pool_size=LICENSE_DB_POOL_SIZE)
+
+# Revocation filter sizing; exceeding the capacity only raises the false positive rate
+REVOCATION_CAPACITY = int(os.environ.get("LICENSE_REVOCATION_CAPACITY", "1000000"))
+REVOCATION_FP_RATE = float(os.environ.get("LICENSE_REVOCATION_FP_RATE", "0.001"))
+
+# Maximum delay before a revocation made by another worker is seen here
+REVOCATION_SYNC_SECONDS = float(os.environ.get("LICENSE_REVOCATION_SYNC_SECONDS", "1.0"))
+
+# How often activation counts buffered in memory are written to the database
+ACTIVATION_FLUSH_SECONDS = float(os.environ.get("LICENSE_ACTIVATION_FLUSH_SECONDS", "1.0"))
+
+# Number of worker processes sharing LICENSE_DB_PATH: LICENSE_WORKERS, else
+# WEB_CONCURRENCY, which uvicorn and gunicorn read as their worker count
+WORKERS = max(1, int(os.environ.get("LICENSE_WORKERS") or os.environ.get("WEB_CONCURRENCY") or "1"))
+
+# uvicorn --workers N sets neither variable, but starts every worker as a
+# multiprocessing child, so a child process shares its limits as well
+SHARED_RATE_LIMITS = WORKERS > 1 or (multiprocessing.parent_process() is not None and os.name == "posix")
+
+def _limiter(name: str, rate_setting: str, rate: str, burst_setting: str, burst: str):
+    rate = float(os.environ.get(rate_setting, rate))
+    burst = float(os.environ.get(burst_setting, burst))
+    if SHARED_RATE_LIMITS:
+        # One set of buckets in a file next to the database, so a client
+        # gets the configured limit whichever worker serves it
+        return SharedTokenBucketLimiter(f"{LICENSE_DB_PATH}.{name}-buckets", rate, burst, RATE_LIMIT_TABLE_SIZE)
+    return TokenBucketLimiter(rate, burst, RATE_LIMIT_TABLE_SIZE)
+
+# Token bucket rate limits in requests per second (a rate of 0 disables the limiter)
+RATE_LIMIT_TABLE_SIZE = int(os.environ.get("LICENSE_RATE_LIMIT_TABLE_SIZE", "50000"))
+client_limiter = _limiter("client", "LICENSE_CLIENT_RATE", "20", "LICENSE_CLIENT_BURST", "40")
+key_limiter = _limiter("key", "LICENSE_KEY_RATE", "2", "LICENSE_KEY_BURST", "10")
+generate_limiter = _limiter("generate", "LICENSE_GENERATE_RATE", "0.2", "LICENSE_GENERATE_BURST", "5")
+
+class VerificationCache:
+    """
+    Bounded LRU cache of verify_license_key results with per-entry expiry
+    """
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = max_entries > 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+    
+    def get(self, key: str, now: float):
+        if not self.enabled:
+            return None
+        
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        result, expires_at = entry
+        if now >= expires_at:
+            # Expired entries count as a miss and are dropped
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+    
+    def put(self, key: str, result, now: float):
+        if not self.enabled:
+            return
+        
+        expires_at = now + self.ttl_seconds
+        valid, _, valid_until, license_type = result
+        if valid and license_type == "monthly":
+            # Never serve a monthly key as valid past its expiry
+            expires_at = min(expires_at, valid_until / 1000)
+        
+        self._entries[key] = (result, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+    
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+verification_cache = VerificationCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+class RevocationFilter:
+    """
+    Bloom filter over revoked license keys
+
+    A negative answer is definitive, so only probable hits need a
+    database round trip to confirm the revocation.
+    """
+    def __init__(self, capacity: int, fp_rate: float):
+        self.num_bits = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+    
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        # Kirsch-Mitzenmacher double hashing
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+    
+    def add(self, key: str):
+        bits = self._bits
+        new = False
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                new = True
+        # Adding a key again (the revoking worker, then the log sync) sets
+        # no new bits, so count stays the number of distinct keys, less
+        # the rare key that was already a false positive
+        if new:
+            self.count += 1
+    
+    def might_contain(self, key: str) -> bool:
+        bits = self._bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+    
+    def rebuild(self, keys):
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
+        for key in keys:
+            self.add(key)
+    
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+revocation_filter = RevocationFilter(REVOCATION_CAPACITY, REVOCATION_FP_RATE)
+
+# Real keys (GEAR-T-TIMESTAMP-SIGNATURE) are about 30 characters; longer
+# ones are rejected before they reach the rate limiter or the cache, whose
+# tables bound the number of entries but not their size
+MAX_LICENSE_KEY_LENGTH = 64
+
+def key_is_plausible(key: str) -> bool:
+    return len(key) <= MAX_LICENSE_KEY_LENGTH
+
+def verify_license_key(key: str):
+    """
+    Verify if a license key is valid, using the in-process result cache
+    """
+    if not key_is_plausible(key):
+        return False, "Invalid license key format", None, None
+    now = time.time()
+    result = verification_cache.get(key, now)
+    if result is None:
+        result = _verify_license_key_uncached(key)
+        verification_cache.put(key, result, now)
+    return result
+
+def _verify_license_key_uncached(key: str):
+    """
+    Verify if a license key is valid
+    In production, you would check against a database
+    """
+    # Simple example - in production use a proper database
+    try:
+        # Key format: PREFIX-TYPE-TIMESTAMP-HMAC
+        parts = key.split('-')
+        if len(parts) != 4 or parts[0] != 'GEAR':  # Gmail Email Attachment Renamer
+            return False, "Invalid license key format", None, None
+        
+        license_type = parts[1]  # 'M' for monthly, 'L' for lifetime
+        timestamp = int(parts[2])
+        signature = parts[3]
+        
+        # Verify signature
+        message = f"{parts[0]}-{parts[1]}-{parts[2]}"
+        expected_sig = sign_license_message(message)
+        
+        # Constant-time comparison to avoid leaking signature prefixes
+        if not hmac.compare_digest(signature.encode(), expected_sig.encode()):
+            return False, "Invalid license signature", None, None
+        
+        # Determine expiration based on license type
+        current_time = int(time.time())
+        
+        if license_type == 'L':  # Lifetime
+            valid_until = current_time + (10 * 365 * 24 * 60 * 60)  # 10 years
+            license_type_str = "lifetime"
+        elif license_type == 'M':  # Monthly
+            valid_until = timestamp + (30 * 24 * 60 * 60)  # 30 days from purchase
+            license_type_str = "monthly"
+            
+            # Check if expired for monthly licenses
+            if current_time > valid_until:
+                return False, "License has expired", None, None
+        else:
+            return False, "Unknown license type", None, None
+            
+        return True, "License is valid", valid_until * 1000, license_type_str  # Convert to milliseconds for JS
+        
+    except Exception as e:
+        return False, f"Error verifying license: {str(e)}", None, None
+
+def _sign_token_payload(payload: str) -> str:
+    return _b64url_encode(_TOKEN_SIGNING_KEY.sign(payload.encode()))
+
+def _token_signature_ok(payload: str, signature: str) -> bool:
+    try:
+        _TOKEN_PUBLIC_KEY.verify(_b64url_decode(signature), payload.encode())
+    except (InvalidSignature, ValueError):
+        return False
+    return True
+
+def issue_offline_token(key: str, valid_until: int, license_type: str, now: float = None):
+    """
+    Create a compact signed token for a verified license
+
+    Format: v2.TYPE.VALIDUNTIL.EXPIRES.KEYSIG.SIGNATURE (times in
+    milliseconds, SIGNATURE a base64url Ed25519 signature of the rest).
+    The token expires at the earlier of the license's validUntil and
+    TOKEN_TTL_SECONDS from now, so revocations are picked up on the next
+    online check. Returns (token, expires_at).
+    """
+    if now is None:
+        now = time.time()
+    expires_at = min(valid_until, int((now + TOKEN_TTL_SECONDS) * 1000))
+    type_code = 'M' if license_type == 'monthly' else 'L'
+    key_sig = key.rsplit('-', 1)[-1]
+    payload = f"{TOKEN_VERSION}.{type_code}.{valid_until}.{expires_at}.{key_sig}"
+    return f"{payload}.{_sign_token_payload(payload)}", expires_at
+
+# Tokens whose signature already checked out, so repeat checks skip it
+_verified_tokens = {}
+_VERIFIED_TOKENS_MAX = 65536
+
+def verify_offline_token(token: str, key: str, now: float = None):
+    """
+    Check an offline token for license key without contacting the store
+
+    Returns the same (valid, message, valid_until, license_type) tuple as
+    verify_license_key; a genuine token issued for another key is invalid.
+    """
+    if now is None:
+        now = time.time()
+    
+    claims = _verified_tokens.get(token)
+    if claims is None:
+        parts = token.split('.')
+        if len(parts) != 6 or parts[0] != TOKEN_VERSION or parts[1] not in ('M', 'L'):
+            return False, "Invalid token format", None, None
+        
+        payload, signature = token.rsplit('.', 1)
+        if not _token_signature_ok(payload, signature):
+            return False, "Invalid token signature", None, None
+        
+        try:
+            valid_until = int(parts[2])
+            expires_at = int(parts[3])
+        except ValueError:
+            return False, "Invalid token format", None, None
+        
+        license_type = "monthly" if parts[1] == 'M' else "lifetime"
+        claims = (valid_until, expires_at, license_type, parts[4])
+        if len(_verified_tokens) >= _VERIFIED_TOKENS_MAX:
+            _verified_tokens.clear()
+        _verified_tokens[token] = claims
+    
+    valid_until, expires_at, license_type, key_sig = claims
+    if not hmac.compare_digest(key.rsplit('-', 1)[-1].encode(), key_sig.encode()):
+        return False, "Token was issued for another license key", None, None
+    if now * 1000 > expires_at:
+        return False, "Token has expired", None, None
+    
+    return True, "License is valid", valid_until, license_type
+
+async def check_license(key: str):
+    """
+    Verify a license key's signature and expiry, then consult the store
+    for revocation
+    """
+    result = verify_license_key(key)
+    if result[0] and revocation_filter.might_contain(key) and await license_store.is_revoked(key):
+        result = (False, "License has been revoked", None, None)
+    metrics.observe_result(result[0], result[1])
+    return result
+
+async def verify(key: str):
+    """
+    The /verify response body for a license key, recording the activation
+    and issuing an offline token when it is valid
+    """
+    valid, message, valid_until, license_type = await check_license(key)
+    
+    token = token_expires_at = None
+    if valid:
+        license_store.record_activation(key)
+        token, token_expires_at = issue_offline_token(key, valid_until, license_type)
+    
+    return {
+        "valid": valid,
+        "message": message,
+        "validUntil": valid_until,
+        "type": license_type,
+        "token": token,
+        "tokenExpiresAt": token_expires_at
+    }
@@ -0,0 +1,223 @@
+import asyncio
+import queue
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS licenses (
+    license_key TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    issued_at INTEGER NOT NULL,
+    revoked INTEGER NOT NULL DEFAULT 0,
+    revoked_at INTEGER,
+    activations INTEGER NOT NULL DEFAULT 0,
+    last_activated_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_licenses_revoked ON licenses(revoked) WHERE revoked = 1;
+CREATE TABLE IF NOT EXISTS revocation_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    license_key TEXT NOT NULL,
+    revoked_at INTEGER NOT NULL
+);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_IN_CHUNK_SIZE = 500
+
+class LicenseStore:
+    """
+    SQLite-backed record of issued licenses, revocations and activations
+
+    All queries run on a small pool of connections inside a dedicated
+    thread pool, so awaiting a store call never blocks the event loop.
+    Activations are counted in memory and written by flush_activations,
+    so verifying a key never waits on a write.
+    """
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self.pool_size = pool_size
+        self._connections = queue.Queue()
+        self._executor = None
+        # license_key -> (activations not yet written, last activation time)
+        self._activations = {}
+
+    async def open(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.pool_size,
+            thread_name_prefix="license-store"
+        )
+        for _ in range(self.pool_size):
+            self._connections.put(self._connect())
+        await self._run(lambda conn: conn.executescript(SCHEMA))
+
+    async def close(self):
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers proceed while a writer commits
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    async def _run(self, func):
+        def task():
+            conn = self._connections.get()
+            try:
+                return func(conn)
+            finally:
+                self._connections.put(conn)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, task)
+
+    async def add_license(self, key: str, license_type: str, issued_at: int):
+        await self._run(lambda conn: conn.execute(
+            "INSERT OR IGNORE INTO licenses (license_key, type, issued_at) VALUES (?, ?, ?)",
+            (key, license_type, issued_at)
+        ))
+
+    async def get_license(self, key: str) -> Optional[dict]:
+        def query(conn):
+            row = conn.execute(
+                "SELECT * FROM licenses WHERE license_key = ?", (key,)
+            ).fetchone()
+            return dict(row) if row is not None else None
+
+        return await self._run(query)
+
+    async def is_revoked(self, key: str) -> bool:
+        def query(conn):
+            row = conn.execute(
+                "SELECT revoked FROM licenses WHERE license_key = ?", (key,)
+            ).fetchone()
+            return bool(row and row[0])
+
+        return await self._run(query)
+
+    async def revoked_among(self, keys: Iterable[str]) -> set:
+        """
+        Return the subset of keys that are revoked, in as few queries as possible
+        """
+        keys = list(keys)
+
+        def query(conn):
+            revoked = set()
+            for start in range(0, len(keys), _IN_CHUNK_SIZE):
+                chunk = keys[start:start + _IN_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT license_key FROM licenses WHERE revoked = 1 AND license_key IN ({placeholders})",
+                    chunk
+                )
+                revoked.update(row[0] for row in rows)
+            return revoked
+
+        return await self._run(query)
+
+    async def revoke(self, key: str) -> bool:
+        """
+        Mark a license as revoked; returns False if the key is unknown
+
+        Each revocation is also appended to revocation_log so that other
+        worker processes sharing the database can pick it up. Revoking a
+        key again changes nothing and logs nothing.
+        """
+        def update(conn):
+            now = int(time.time())
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = conn.execute(
+                    "UPDATE licenses SET revoked = 1, revoked_at = ? WHERE license_key = ? AND revoked = 0",
+                    (now, key)
+                )
+                if cursor.rowcount > 0:
+                    conn.execute(
+                        "INSERT INTO revocation_log (license_key, revoked_at) VALUES (?, ?)",
+                        (key, now)
+                    )
+                    known = True
+                else:
+                    known = conn.execute(
+                        "SELECT 1 FROM licenses WHERE license_key = ?", (key,)
+                    ).fetchone() is not None
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return known
+
+        return await self._run(update)
+
+    async def last_revocation_id(self) -> int:
+        def query(conn):
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM revocation_log").fetchone()[0]
+
+        return await self._run(query)
+
+    async def revocations_since(self, last_id: int):
+        """
+        Return (keys, newest_id) for revocations logged after last_id
+        """
+        def query(conn):
+            rows = conn.execute(
+                "SELECT id, license_key FROM revocation_log WHERE id > ? ORDER BY id",
+                (last_id,)
+            ).fetchall()
+            if not rows:
+                return [], last_id
+            return [row[1] for row in rows], rows[-1][0]
+
+        return await self._run(query)
+
+    async def revoked_keys(self) -> List[str]:
+        def query(conn):
+            rows = conn.execute("SELECT license_key FROM licenses WHERE revoked = 1")
+            return [row[0] for row in rows]
+
+        return await self._run(query)
+
+    def record_activation(self, key: str):
+        count, _ = self._activations.get(key, (0, 0))
+        self._activations[key] = (count + 1, int(time.time()))
+
+    async def flush_activations(self) -> int:
+        """
+        Write the buffered activation counts in one transaction; returns
+        the number of licenses updated
+        """
+        pending, self._activations = self._activations, {}
+        if not pending:
+            return 0
+
+        def update(conn):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "UPDATE licenses SET activations = activations + ?, "
+                    "last_activated_at = MAX(COALESCE(last_activated_at, 0), ?) WHERE license_key = ?",
+                    [(count, activated_at, key) for key, (count, activated_at) in pending.items()]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        try:
+            await self._run(update)
+        except Exception:
+            # Keep the counts for the next flush
+            for key, (count, activated_at) in pending.items():
+                newer_count, newer_at = self._activations.get(key, (0, 0))
+                self._activations[key] = (count + newer_count, max(activated_at, newer_at))
+            raise
+        return len(pending)
@@ -0,0 +1,172 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows; only TokenBucketLimiter is available
+    fcntl = None
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by an arbitrary string (client IP, license key)
+
+    Buckets live in a bounded LRU table: once max_entries is reached the
+    least recently seen bucket is dropped, so memory stays flat no matter
+    how many distinct keys are sprayed at the service. A dropped bucket
+    simply starts full again the next time its key is seen.
+    """
+    def __init__(self, rate: float, burst: float, max_entries: int = 50000):
+        self.rate = rate
+        self.burst = burst
+        self.max_entries = max_entries
+        self.enabled = rate > 0
+        self.evictions = 0
+        self._buckets = OrderedDict()
+
+    def acquire(self, key: str, cost: float = 1.0, now: float = None):
+        """
+        Take cost tokens from key's bucket
+
+        A cost above the burst is allowed from a full bucket and leaves it
+        in debt, so large requests still pay for every token. Returns
+        (allowed, retry_after_seconds).
+        """
+        if not self.enabled:
+            return True, 0
+        if now is None:
+            now = time.monotonic()
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = self.burst
+        else:
+            tokens, last = bucket
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            self._buckets.move_to_end(key)
+
+        if tokens >= min(cost, self.burst):
+            tokens -= cost
+            allowed = True
+            retry_after = 0
+        else:
+            allowed = False
+            retry_after = max(1, math.ceil((cost - tokens) / self.rate))
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_entries:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+        return allowed, retry_after
+
+    def __len__(self):
+        return len(self._buckets)
+
+class SharedTokenBucketLimiter:
+    """
+    Token buckets shared by every process that opens the same file
+
+    Uvicorn workers each see only the connections routed to them, so
+    per-process buckets would give a client whose keep-alive connection
+    stays on one worker just that worker's share. Here the buckets live
+    in a fixed-size hash table in a memory-mapped file, updated under an
+    exclusive flock, so all workers enforce one limit together.
+
+    Keys are stored as 64-bit digests. A key probes PROBES slots; when
+    all are taken by other keys the least recently used one is replaced
+    and, as with TokenBucketLimiter, starts full again next time.
+    """
+    SLOT = struct.Struct("<Qdd")  # key digest (0 = empty), tokens, last update
+    PROBES = 8
+
+    def __init__(self, path: str, rate: float, burst: float, max_entries: int = 50000):
+        if fcntl is None:
+            raise RuntimeError("shared rate limits need fcntl (POSIX)")
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.max_entries = max_entries
+        self.enabled = rate > 0
+        self.evictions = 0
+        self._size = max_entries * self.SLOT.size
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        # A forked worker must not share the parent's file description, or
+        # its flock would not exclude the parent
+        if self._pid == os.getpid():
+            return
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < self._size:
+                os.ftruncate(self._fd, self._size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, self._size)
+        self._pid = os.getpid()
+
+    def _slot(self, digest):
+        """
+        Offset of digest's slot, or of the slot to reuse for it, and
+        whether the slot already holds it
+        """
+        start = digest % self.max_entries
+        oldest = None
+        for probe in range(self.PROBES):
+            offset = ((start + probe) % self.max_entries) * self.SLOT.size
+            stored, _, last = self.SLOT.unpack_from(self._map, offset)
+            if stored == digest:
+                return offset, True
+            if stored == 0:
+                return offset, False
+            if oldest is None or last < oldest[1]:
+                oldest = (offset, last)
+        self.evictions += 1
+        return oldest[0], False
+
+    def acquire(self, key: str, cost: float = 1.0, now: float = None):
+        """
+        Take cost tokens from key's bucket
+
+        A cost above the burst is allowed from a full bucket and leaves it
+        in debt, so large requests still pay for every token. Returns
+        (allowed, retry_after_seconds).
+        """
+        if not self.enabled:
+            return True, 0
+        self._open()
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            # Read the clock under the lock so timestamps only move forward
+            if now is None:
+                now = time.monotonic()
+            offset, found = self._slot(digest)
+            tokens = self.burst
+            if found:
+                _, tokens, last = self.SLOT.unpack_from(self._map, offset)
+                if last <= now + 1:
+                    tokens = min(self.burst, tokens + max(0.0, now - last) * self.rate)
+                else:
+                    # Written before a reboot reset the clock: start full
+                    tokens = self.burst
+
+            if tokens >= min(cost, self.burst):
+                tokens -= cost
+                allowed = True
+                retry_after = 0
+            else:
+                allowed = False
+                retry_after = max(1, math.ceil((cost - tokens) / self.rate))
+            self.SLOT.pack_into(self._map, offset, digest, tokens, now)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return allowed, retry_after
@@ -0,0 +1,126 @@
+"""
+Tests for the fast-starting lean_app.py entry point.
+
+Checks that importing it stays free of FastAPI and pydantic, that its
+POST /verify answers exactly like verify_license.app, and that its cold
+start stays within a budget.
+
+    python -m pytest -q api
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+import lean_app
+import license_service
+import verify_license
+from bench_startup import bench_env, cold_start
+from rate_limit import TokenBucketLimiter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Milliseconds from launching uvicorn to the first /verify response
+STARTUP_BUDGET_MS = float(os.environ.get("LICENSE_STARTUP_BUDGET_MS", "1000"))
+
+def test_import_leaves_out_fastapi():
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, lean_app; print(' '.join(sorted(sys.modules)))"],
+        cwd=HERE, env=bench_env(), capture_output=True, text=True, check=True
+    )
+    modules = set(result.stdout.split())
+    assert "lean_app" in modules
+    assert "fastapi" not in modules
+    assert "pydantic" not in modules
+
+async def post_verify(app, headers=None, **kwargs):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        headers = {"Origin": "chrome-extension://test", **(headers or {})}
+        return await client.post("/verify", headers=headers, **kwargs)
+
+async def both_apps(**kwargs):
+    """
+    The lean and FastAPI responses to the same POST /verify
+    """
+    return await post_verify(lean_app.app, **kwargs), await post_verify(verify_license.app, **kwargs)
+
+def run_service(test):
+    async def run():
+        await license_service.start()
+        try:
+            return await test()
+        finally:
+            await license_service.stop()
+    return asyncio.run(run())
+
+def assert_same_response(lean, full):
+    assert lean.status_code == full.status_code
+    assert dict(lean.headers) == dict(full.headers)
+    assert lean.content == full.content
+
+def valid_key():
+    timestamp = int(time.time())
+    message = f"GEAR-L-{timestamp}"
+    return f"{message}-{license_service.sign_license_message(message)}", timestamp
+
+def test_verify_valid_key_matches():
+    key, timestamp = valid_key()
+
+    async def test():
+        await license_service.license_store.add_license(key, "lifetime", timestamp)
+        return await both_apps(json={"licenseKey": key})
+    lean, full = run_service(test)
+
+    assert lean.status_code == full.status_code == 200
+    assert dict(lean.headers) == dict(full.headers)
+    lean_body, full_body = lean.json(), full.json()
+    assert lean_body["valid"] is True
+    # Tokens are issued per request, so they may straddle a clock tick
+    for body in (lean_body, full_body):
+        assert license_service.verify_offline_token(body.pop("token"), key)[0]
+        assert body.pop("tokenExpiresAt") > time.time() * 1000
+    assert lean_body == full_body
+
+@pytest.mark.parametrize("key", [
+    "GEAR-L-1700000000-0000000000",
+    "not-a-license-key",
+    "GEAR-L-1700000000-" + "0" * 200
+])
+def test_verify_invalid_key_matches(key):
+    lean, full = run_service(lambda: both_apps(json={"licenseKey": key}))
+    assert lean.json()["valid"] is False
+    assert_same_response(lean, full)
+
+@pytest.mark.parametrize("kwargs", [
+    {"json": {}},
+    {"json": {"licenseKey": 42}},
+    {"content": b"{not json", "headers": {"Content-Type": "application/json"}}
+])
+def test_verify_validation_error_matches(kwargs):
+    lean, full = run_service(lambda: both_apps(**kwargs))
+    assert lean.status_code == 422
+    assert_same_response(lean, full)
+
+def test_verify_rate_limited_matches(monkeypatch):
+    # One request per key, then a long wait; each app gets its own bucket
+    # so both see the same second request
+    monkeypatch.setattr(lean_app, "key_limiter", TokenBucketLimiter(0.001, 1))
+    monkeypatch.setattr(verify_license, "key_limiter", TokenBucketLimiter(0.001, 1))
+    payload = {"licenseKey": "GEAR-L-1700000000-0000000000"}
+
+    async def test():
+        await both_apps(json=payload)
+        return await both_apps(json=payload)
+    lean, full = run_service(test)
+
+    assert lean.status_code == 429
+    assert_same_response(lean, full)
+
+def test_cold_start_within_budget():
+    verify_seconds, _ = cold_start("lean_app")
+    assert verify_seconds * 1000 < STARTUP_BUDGET_MS
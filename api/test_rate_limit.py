@@ -0,0 +1,34 @@
+"""
+Tests for the token bucket limiters in rate_limit.py.
+
+    python -m pytest -q api
+"""
+import pytest
+
+from rate_limit import SharedTokenBucketLimiter, TokenBucketLimiter, fcntl
+
+@pytest.fixture(params=["local", "shared"])
+def limiter(request, tmp_path):
+    if request.param == "shared":
+        if fcntl is None:
+            pytest.skip("SharedTokenBucketLimiter needs fcntl")
+        return SharedTokenBucketLimiter(str(tmp_path / "buckets"), 1, 10, 64)
+    return TokenBucketLimiter(1, 10)
+
+def test_cost_is_taken_from_bucket(limiter):
+    assert limiter.acquire("a", 6, now=100.0) == (True, 0)
+    assert limiter.acquire("a", 6, now=100.0) == (False, 2)
+    assert limiter.acquire("a", 6, now=102.0) == (True, 0)
+    # Other keys have their own bucket
+    assert limiter.acquire("b", 10, now=102.0) == (True, 0)
+
+def test_cost_above_burst_leaves_bucket_in_debt(limiter):
+    assert limiter.acquire("a", 25, now=100.0) == (True, 0)
+    # 15 tokens owed plus the 1 asked for
+    assert limiter.acquire("a", 1, now=100.0) == (False, 16)
+    assert limiter.acquire("a", 1, now=115.0) == (False, 1)
+    assert limiter.acquire("a", 1, now=116.0) == (True, 0)
+
+def test_cost_above_burst_needs_a_full_bucket(limiter):
+    assert limiter.acquire("a", 1, now=100.0) == (True, 0)
+    assert limiter.acquire("a", 25, now=100.0) == (False, 16)
@@ -0,0 +1,62 @@
+"""
+Tests for the FastAPI license API in verify_license.py.
+
+    python -m pytest -q api
+"""
+import asyncio
+
+import httpx
+
+import license_service
+import verify_license
+from rate_limit import TokenBucketLimiter
+
+def post_batch(keys):
+    async def run():
+        await license_service.start()
+        try:
+            transport = httpx.ASGITransport(app=verify_license.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+                return await client.post("/verify/batch", json={"licenseKeys": keys})
+        finally:
+            await license_service.stop()
+    return asyncio.run(run())
+
+def batch_keys(n):
+    return [f"GEAR-L-1700000000-{i:010d}" for i in range(n)]
+
+def test_batch_costs_one_client_token_per_key(monkeypatch):
+    limiter = TokenBucketLimiter(0.001, 10)
+    monkeypatch.setattr(verify_license, "client_limiter", limiter)
+
+    assert post_batch(batch_keys(6)).status_code == 200
+    response = post_batch(batch_keys(6))
+    assert response.status_code == 429
+    # 4 tokens left of 10; 2 more at 0.001/s
+    assert response.headers["retry-after"] == "2000"
+
+def test_batch_larger_than_burst_is_charged_in_full(monkeypatch):
+    limiter = TokenBucketLimiter(1, 10)
+    monkeypatch.setattr(verify_license, "client_limiter", limiter)
+
+    assert post_batch(batch_keys(50)).status_code == 200
+    response = post_batch(batch_keys(1))
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 40
+
+def test_batch_applies_key_limit(monkeypatch):
+    monkeypatch.setattr(verify_license, "key_limiter", TokenBucketLimiter(0.001, 2))
+    key = "GEAR-L-1700000000-0000000000"
+
+    assert post_batch([key, key]).status_code == 200
+    assert post_batch([key]).status_code == 429
+    # Implausible keys skip the key limiter, as on /verify
+    assert post_batch(["x" * 100] * 3).status_code == 200
+
+def test_oversized_batch_is_rejected_before_charging(monkeypatch):
+    limiter = TokenBucketLimiter(0.001, 10)
+    monkeypatch.setattr(verify_license, "client_limiter", limiter)
+    monkeypatch.setattr(verify_license, "MAX_BATCH_SIZE", 5)
+
+    assert post_batch(batch_keys(6)).status_code == 413
+    assert post_batch(batch_keys(5)).status_code == 200
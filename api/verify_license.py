@@ -1,14 +1,32 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
-import hashlib
 import hmac
 import time
-import os
-from typing import Optional
-import json
+from typing import List, Optional
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+import license_service
+# Verification helpers are re-exported for scripts that import this module
+from license_service import (
+    ADMIN_TOKEN, MAX_BATCH_SIZE, check_license, client_limiter, generate_limiter, issue_offline_token,
+    key_is_plausible, key_limiter, license_store, metrics, revocation_filter, sign_license_message,
+    verification_cache, verify, verify_license_key, verify_offline_token
+)
+from rate_limit import TokenBucketLimiter
+
+__all__ = [
+    "app", "check_license", "issue_offline_token", "verify", "verify_license_key", "verify_offline_token"
+]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await license_service.start()
+    yield
+    await license_service.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -19,8 +37,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Would be stored in a database in production
-LICENSE_SECRET = os.environ.get("LICENSE_SECRET", "your-secret-key-here")
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    
+    # Label by route template so path parameters don't explode cardinality
+    route = request.scope.get("route")
+    route_path = route.path if route is not None else "unmatched"
+    metrics.observe_request(request.method, route_path, response.status_code, elapsed)
+    return response
+
+def enforce_rate_limit(limiter: TokenBucketLimiter, key: str, cost: float = 1.0):
+    allowed, retry_after = limiter.acquire(key, cost)
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+def client_id(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
 
 class LicenseVerifyRequest(BaseModel):
     licenseKey: str
@@ -30,69 +69,66 @@ class LicenseVerifyResponse(BaseModel):
     message: Optional[str] = None
     validUntil: Optional[int] = None
     type: Optional[str] = None
+    token: Optional[str] = None
+    tokenExpiresAt: Optional[int] = None
+
+class LicenseVerifyBatchRequest(BaseModel):
+    licenseKeys: List[str]
 
-def verify_license_key(key: str):
-    """
-    Verify if a license key is valid
-    In production, you would check against a database
-    """
-    # Simple example - in production use a proper database
-    try:
-        # Key format: PREFIX-TYPE-TIMESTAMP-HMAC
-        parts = key.split('-')
-        if len(parts) != 4 or parts[0] != 'GEAR':  # Gmail Email Attachment Renamer
-            return False, "Invalid license key format", None, None
-        
-        license_type = parts[1]  # 'M' for monthly, 'L' for lifetime
-        timestamp = int(parts[2])
-        signature = parts[3]
-        
-        # Verify signature
-        message = f"{parts[0]}-{parts[1]}-{parts[2]}"
-        expected_sig = hmac.new(
-            LICENSE_SECRET.encode(), 
-            message.encode(), 
-            hashlib.sha256
-        ).hexdigest()[:10]
-        
-        if signature != expected_sig:
-            return False, "Invalid license signature", None, None
-        
-        # Determine expiration based on license type
-        current_time = int(time.time())
-        
-        if license_type == 'L':  # Lifetime
-            valid_until = current_time + (10 * 365 * 24 * 60 * 60)  # 10 years
-            license_type_str = "lifetime"
-        elif license_type == 'M':  # Monthly
-            valid_until = timestamp + (30 * 24 * 60 * 60)  # 30 days from purchase
-            license_type_str = "monthly"
-            
-            # Check if expired for monthly licenses
-            if current_time > valid_until:
-                return False, "License has expired", None, None
-        else:
-            return False, "Unknown license type", None, None
-            
-        return True, "License is valid", valid_until * 1000, license_type_str  # Convert to milliseconds for JS
-        
-    except Exception as e:
-        return False, f"Error verifying license: {str(e)}", None, None
+class LicenseVerifyBatchResponse(BaseModel):
+    results: List[LicenseVerifyResponse]
 
 @app.post("/verify", response_model=LicenseVerifyResponse)
-async def verify_license(request: LicenseVerifyRequest):
-    valid, message, valid_until, license_type = verify_license_key(request.licenseKey)
+async def verify_license(request: LicenseVerifyRequest, http_request: Request):
+    enforce_rate_limit(client_limiter, client_id(http_request))
+    if key_is_plausible(request.licenseKey):
+        enforce_rate_limit(key_limiter, request.licenseKey)
     
-    return {
-        "valid": valid,
-        "message": message,
-        "validUntil": valid_until,
-        "type": license_type
-    }
+    return await verify(request.licenseKey)
+
+@app.post("/verify/batch", response_model=LicenseVerifyBatchResponse)
+async def verify_license_batch(request: LicenseVerifyBatchRequest, http_request: Request):
+    if len(request.licenseKeys) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch may contain at most {MAX_BATCH_SIZE} license keys"
+        )
+    
+    # Each key costs what a /verify request for it would
+    enforce_rate_limit(client_limiter, client_id(http_request), max(1, len(request.licenseKeys)))
+    for key in request.licenseKeys:
+        if key_is_plausible(key):
+            enforce_rate_limit(key_limiter, key)
+    
+    checked = [verify_license_key(key) for key in request.licenseKeys]
+    
+    # One store round trip for the keys the revocation filter cannot rule out
+    suspects = [
+        key for key, result in zip(request.licenseKeys, checked)
+        if result[0] and revocation_filter.might_contain(key)
+    ]
+    revoked = await license_store.revoked_among(suspects) if suspects else set()
+    
+    results = []
+    for key, (valid, message, valid_until, license_type) in zip(request.licenseKeys, checked):
+        if key in revoked:
+            valid, message, valid_until, license_type = False, "License has been revoked", None, None
+        metrics.observe_result(valid, message)
+        results.append({
+            "valid": valid,
+            "message": message,
+            "validUntil": valid_until,
+            "type": license_type
+        })
+    
+    # Results are returned in the same order as the submitted keys
+    return {"results": results}
 
 # For testing - generate a license key
 @app.get("/generate/{license_type}")
-async def generate_license(license_type: str):
+async def generate_license(license_type: str, http_request: Request):
+    enforce_rate_limit(generate_limiter, client_id(http_request))
+    
     if license_type not in ['monthly', 'lifetime']:
         raise HTTPException(status_code=400, detail="License type must be 'monthly' or 'lifetime'")
     
@@ -100,16 +136,35 @@ async def generate_license(license_type: str):
     type_code = 'M' if license_type == 'monthly' else 'L'
     
     message = f"GEAR-{type_code}-{timestamp}"
-    signature = hmac.new(
-        LICENSE_SECRET.encode(), 
-        message.encode(), 
-        hashlib.sha256
-    ).hexdigest()[:10]
+    signature = sign_license_message(message)
     
     license_key = f"{message}-{signature}"
+    await license_store.add_license(license_key, license_type, timestamp)
     
     return {"license_key": license_key, "type": license_type}
 
+@app.post("/revoke/{license_key}")
+async def revoke_license(license_key: str, x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    if not await license_store.revoke(license_key):
+        raise HTTPException(status_code=404, detail="Unknown license key")
+    revocation_filter.add(license_key)
+    
+    return {"license_key": license_key, "revoked": True}
+
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(
+        metrics.render(
+            cache_stats=verification_cache.stats(),
+            revoked_keys=revocation_filter.count
+        ),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # Health check endpoint
 @app.get("/")
 async def root():
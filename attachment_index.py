@@ -0,0 +1,123 @@
+"""
+Persistent content index for deduplicating extracted attachments.
+
+Files are keyed by size plus a quick BLAKE2b hash of their first and
+last 64 KiB. Only when that cheap key matches an existing entry is a full
+SHA-256 computed (and cached in the index) to confirm the duplicate. The
+index is a SQLite file, so it survives restarts and stays fast with tens
+of millions of entries.
+"""
+import hashlib
+import os
+import sqlite3
+
+SAMPLE_SIZE = 64 * 1024
+READ_SIZE = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    size INTEGER NOT NULL,
+    quick_hash BLOB NOT NULL,
+    sha256 BLOB,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_key ON files(size, quick_hash);
+"""
+
+def quick_hash(path, size=None):
+    """
+    BLAKE2b-128 of the first and last SAMPLE_SIZE bytes of a file
+    """
+    if size is None:
+        size = os.path.getsize(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(SAMPLE_SIZE))
+        if size > SAMPLE_SIZE:
+            f.seek(max(SAMPLE_SIZE, size - SAMPLE_SIZE))
+            digest.update(f.read(SAMPLE_SIZE))
+    return digest.digest()
+
+def full_hash(path):
+    digest = hashlib.sha256()
+    buffer = bytearray(READ_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.digest()
+
+class AttachmentIndex:
+    """
+    Size + quick-hash index of files already written, backed by SQLite
+    """
+    def __init__(self, path, commit_every=1000):
+        self.path = path
+        self.commit_every = commit_every
+        self.full_hashes = 0
+        self._pending = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def find_duplicate(self, path, size):
+        """
+        Return (existing_path, key) where existing_path is an indexed file
+        with the same content as path, or None; key is passed to add()
+        """
+        quick = quick_hash(path, size)
+        rows = self._conn.execute(
+            "SELECT id, sha256, path FROM files WHERE size = ? AND quick_hash = ?",
+            (size, quick)
+        ).fetchall()
+        if not rows:
+            return None, (size, quick, None)
+
+        sha = full_hash(path)
+        self.full_hashes += 1
+        for row_id, row_sha, row_path in rows:
+            if not os.path.exists(row_path):
+                # The earlier copy was deleted; forget it so this one is indexed
+                self._conn.execute("DELETE FROM files WHERE id = ?", (row_id,))
+                continue
+            if row_sha is None:
+                row_sha = full_hash(row_path)
+                self.full_hashes += 1
+                self._conn.execute("UPDATE files SET sha256 = ? WHERE id = ?", (row_sha, row_id))
+            if row_sha == sha:
+                return row_path, (size, quick, sha)
+        return None, (size, quick, sha)
+
+    def add(self, path, key):
+        size, quick, sha = key
+        self._conn.execute(
+            "INSERT INTO files (size, quick_hash, sha256, path) VALUES (?, ?, ?, ?)",
+            (size, quick, sha, os.path.abspath(path))
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self._conn.commit()
+        self._pending = 0
+
+    def sync(self):
+        """
+        Commit and checkpoint the WAL into the database file with fsync, so
+        the index survives a power loss (a commit alone survives a crash)
+        """
+        self.commit()
+        self._conn.execute("PRAGMA wal_checkpoint(FULL)")
+
+    def close(self):
+        self.commit()
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
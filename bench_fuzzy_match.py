@@ -0,0 +1,133 @@
+"""
+Benchmark corpus for fuzzy download matching.
+
+Builds a reproducible set of pending Gmail downloads (invoices, scans,
+photos, attachment_<id> names, PDF viewer names, ...) and a stream of
+finished downloads: renamed copies like "Invoice_42 (1).pdf", ID-only
+names, generic PDF viewer names and files that match nothing. Every
+finished download is matched with reference_match() (the scan in
+background.js) and FuzzyMatcher, results are checked to be identical,
+and both are timed.
+
+Usage:
+    python bench_fuzzy_match.py --pending 100 1000 5000 --queries 300
+    python bench_fuzzy_match.py --pending 2000 --save-corpus corpus.json
+"""
+import argparse
+import json
+import random
+import time
+
+from fuzzy_match import FuzzyMatcher, reference_match
+
+WORDS = ["Invoice", "Report", "Budget", "Contract", "Statement", "Minutes", "Proposal", "Receipt",
+         "Q1", "Q2", "Q3", "Q4", "Financials", "Draft", "Final", "Signed", "Scan", "Summary",
+         "ACME", "Globex", "Initech", "Northwind", "Project", "Plan", "Notes", "Offer", "Quote"]
+EXTENSIONS = ["pdf", "pdf", "pdf", "docx", "xlsx", "csv", "jpeg", "png", "zip", "txt"]
+
+def pending_name(rng):
+    kind = rng.random()
+    if kind < 0.1:
+        return f"attachment_{rng.randrange(10 ** 12, 10 ** 13)}"
+    if kind < 0.2:
+        return f"IMG_{rng.randrange(10000):04d}.{rng.choice(['jpeg', 'jpg', 'png'])}"
+    if kind < 0.25:
+        return f"scan_{rng.randrange(10 ** 12, 10 ** 13)}.pdf"
+    words = rng.sample(WORDS, rng.randint(1, 4))
+    if rng.random() < 0.5:
+        words.append(str(rng.randrange(1, 5000)))
+    separator = rng.choice([" ", "_", "-", " - "])
+    return separator.join(words) + "." + rng.choice(EXTENSIONS)
+
+def mutate(rng, name):
+    """
+    The kinds of change Chrome or Gmail make to a downloaded filename
+    """
+    stem, dot, ext = name.rpartition(".")
+    if not dot:
+        stem, ext = name, ""
+    kind = rng.random()
+    if kind < 0.3:
+        stem = f"{stem} ({rng.randint(1, 3)})"
+    elif kind < 0.5:
+        stem = stem.replace(" ", "_")
+    elif kind < 0.6:
+        stem = stem.lower()
+    elif kind < 0.7:
+        stem = stem[:max(1, len(stem) - rng.randint(1, 4))]
+    elif kind < 0.8 and "attachment_" in stem:
+        ext = "pdf"
+    return f"{stem}.{ext}" if ext else stem
+
+def make_corpus(pending_count, query_count, seed=0):
+    rng = random.Random(seed)
+    pending = {f"download_{i}": pending_name(rng) for i in range(pending_count)}
+    names = list(pending.values())
+    queries = []
+    for _ in range(query_count):
+        kind = rng.random()
+        if kind < 0.6:
+            queries.append(mutate(rng, rng.choice(names)))
+        elif kind < 0.7:
+            queries.append(rng.choice(["document.pdf", "agreement", "document", "file.pdf"]))
+        else:
+            queries.append(pending_name(rng))
+    return pending, queries
+
+def run(pending, queries):
+    matcher = FuzzyMatcher()
+    for key, name in pending.items():
+        matcher.add(key, name)
+
+    started = time.perf_counter()
+    expected = [reference_match(pending, query) for query in queries]
+    reference_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = [matcher.best_match(query) for query in queries]
+    indexed_seconds = time.perf_counter() - started
+
+    mismatches = [(query, want, got) for query, want, got in zip(queries, expected, actual) if want != got]
+    return {
+        "pending": len(pending),
+        "queries": len(queries),
+        "matched": sum(key is not None for key in expected),
+        "mismatches": len(mismatches),
+        "reference_ms_per_query": round(reference_seconds * 1000 / len(queries), 3),
+        "indexed_ms_per_query": round(indexed_seconds * 1000 / len(queries), 3),
+        "speedup": round(reference_seconds / indexed_seconds, 1) if indexed_seconds else None,
+        "edit_distances_per_query": round(matcher.edit_distances / len(queries), 1),
+        "examples": mismatches[:5]
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the background.js fuzzy matching scan with FuzzyMatcher")
+    parser.add_argument("--pending", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-corpus", help="write the generated corpus to this JSON file")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for count in args.pending:
+        pending, queries = make_corpus(count, args.queries, args.seed)
+        if args.save_corpus:
+            with open(args.save_corpus, "w") as f:
+                json.dump({"pending": pending, "queries": queries}, f, indent=2)
+        stats = run(pending, queries)
+        results.append(stats)
+        print(f"{stats['pending']:>6} pending  reference {stats['reference_ms_per_query']:>9.3f} ms/query  "
+              f"indexed {stats['indexed_ms_per_query']:>7.3f} ms/query  ({stats['speedup']}x, "
+              f"{stats['edit_distances_per_query']} edit distances/query)  "
+              f"{stats['matched']}/{stats['queries']} matched, {stats['mismatches']} mismatches")
+        for query, want, got in stats["examples"]:
+            print(f"  MISMATCH {query!r}: reference {pending.get(want)!r}, indexed {pending.get(got)!r}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if any(stats["mismatches"] for stats in results) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
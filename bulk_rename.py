@@ -0,0 +1,681 @@
+"""
+Bulk attachment extractor for Google Takeout mbox files and .eml folders.
+
+Every attachment is written to the output directory under the same
+naming scheme the extension uses (see filename_pattern.py), with
+DateFormat taken from the message's Date header. Messages are streamed
+line by line and attachments are decoded in fixed-size chunks straight
+to disk, so memory use depends neither on archive nor attachment size.
+
+Usage:
+    python bulk_rename.py All_mail.mbox renamed/
+    python bulk_rename.py eml_folder/ renamed/ --pattern SenderName_OriginalFilename --date-format DD.MM.YYYY
+    python bulk_rename.py All_mail.mbox renamed/ --jobs 8
+    python bulk_rename.py All_mail.mbox renamed/ --incremental
+
+With --jobs N, messages are parsed and decoded in a pool of N processes
+while a single writer names and moves files into place in mailbox
+order, so the output tree is identical to a serial run.
+
+Finished messages are checkpointed in OUTPUT/.bulk_rename_journal.jsonl.
+Re-running after an interruption skips everything already extracted;
+--incremental also starts reading an mbox where the last run stopped, so
+a nightly run over a growing mailbox only touches new messages.
+"""
+import argparse
+import binascii
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from email import policy
+from email.header import decode_header, make_header
+from email.parser import BytesParser
+from email.utils import parsedate_to_datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from attachment_index import AttachmentIndex
+from extraction_journal import ExtractionJournal
+from filename_pattern import DEFAULT_DATE_FORMAT, DEFAULT_PATTERN, SequenceCounter, compile_pattern
+
+# Encoded bytes buffered before each base64 decode and write (multiple of 4)
+CHUNK_SIZE = 1 << 20
+
+# Longest piece of a line read at once; longer lines are handled in pieces
+MAX_LINE = 1 << 16
+
+TMP_DIR_NAME = ".bulk_rename_tmp"
+INDEX_NAME = ".attachment_index.sqlite"
+JOURNAL_NAME = ".bulk_rename_journal.jsonl"
+
+# Longest file name most filesystems accept, in bytes
+MAX_NAME_BYTES = 255
+
+# Control characters no filesystem path may carry (NUL) or should (the rest)
+_CONTROL_CHARS = re.compile(r"[\x00-\x1f]")
+
+_HEADER_PARSER = BytesParser(policy=policy.default)
+_BASE64_IGNORED = b" \t\r\n"
+
+def iter_mbox_spans(path, start_offset=0):
+    """
+    Yield (path, offset, length) for each message in an mbox file
+
+    Messages start at lines beginning with b"From "; the span covers the
+    message after that separator line. Only one line is held in memory.
+    Scanning begins at start_offset, which must be the start of a line.
+    """
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        start = None
+        offset = start_offset
+        for line in f:
+            if line.startswith(b"From "):
+                if start is not None:
+                    yield path, start, offset - start
+                start = offset + len(line)
+            offset += len(line)
+        if start is not None:
+            yield path, start, offset - start
+
+def iter_eml_spans(directory):
+    """
+    Yield (path, 0, size) for every .eml file, in a stable order
+    """
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".eml"):
+                path = os.path.join(root, name)
+                yield path, 0, os.path.getsize(path)
+
+def iter_messages(source, start_offset=0):
+    if os.path.isdir(source):
+        return iter_eml_spans(source)
+    return iter_mbox_spans(source, start_offset)
+
+def resume_offset(path, offset):
+    """
+    offset if an mbox file can be read on from there, else 0
+
+    The journalled end of the last message must still be followed by a
+    b"From " separator (or the end of the file); otherwise the mailbox
+    was rewritten and has to be scanned from the start.
+    """
+    if offset <= 0:
+        return 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        head = f.read(5)
+    if head == b"From " or (head == b"" and os.path.getsize(path) == offset):
+        return offset
+    return 0
+
+def message_sender(headers):
+    """
+    The From header as written, with encoded words decoded; str() of the
+    policy.default header would re-quote a bare display name ("Ops Team")
+    """
+    for name, value in headers.raw_items():
+        if name.lower() == "from":
+            value = " ".join(line.strip() for line in value.splitlines())
+            try:
+                return str(make_header(decode_header(value)))
+            except (LookupError, UnicodeError, ValueError):
+                return value
+    return ""
+
+def message_date(message):
+    try:
+        return parsedate_to_datetime(message["Date"]).date()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+class SpanReader:
+    """
+    Line reader confined to one message's byte span
+    """
+    def __init__(self, f, length):
+        self._f = f
+        self._remaining = length
+        self.at_line_start = True
+
+    def readline(self):
+        if self._remaining <= 0:
+            return b""
+        line = self._f.readline(min(self._remaining, MAX_LINE))
+        self._remaining -= len(line)
+        return line
+
+    def next_line(self):
+        """
+        Return (line, starts_a_line) so callers only test real line starts
+        for MIME delimiters
+        """
+        starts = self.at_line_start
+        line = self.readline()
+        self.at_line_start = line.endswith(b"\n")
+        return line, starts
+
+def read_headers(reader):
+    lines = []
+    while True:
+        line, _ = reader.next_line()
+        if not line or line in (b"\n", b"\r\n"):
+            break
+        lines.append(line)
+    return _HEADER_PARSER.parsebytes(b"".join(lines), headersonly=True)
+
+def _delimiter(line, boundaries):
+    """
+    Return (boundary, is_closing) if line delimits any enclosing part
+    """
+    if not boundaries or not line.startswith(b"--"):
+        return None
+    stripped = line.rstrip()
+    for boundary in reversed(boundaries):
+        if stripped == b"--" + boundary:
+            return boundary, False
+        if stripped == b"--" + boundary + b"--":
+            return boundary, True
+    return None
+
+class Base64ChunkDecoder:
+    """
+    Decode base64 lines into a file through one pre-allocated buffer
+
+    Encoded input is packed into a fixed CHUNK_SIZE bytearray and decoded
+    a chunk at a time, so memory does not depend on attachment size.
+    """
+    def __init__(self, out, chunk_size=CHUNK_SIZE):
+        self.out = out
+        self._buffer = bytearray(chunk_size)
+        self._view = memoryview(self._buffer)
+        self._used = 0
+
+    def feed(self, line):
+        data = memoryview(line.translate(None, _BASE64_IGNORED))
+        size = len(self._buffer)
+        while data:
+            take = min(size - self._used, len(data))
+            self._view[self._used:self._used + take] = data[:take]
+            self._used += take
+            data = data[take:]
+            if self._used == size:
+                self._flush(final=False)
+
+    def decode_from(self, reader, boundaries):
+        """
+        Decode body lines from reader up to the next delimiter and return it
+
+        This is the hot loop for large attachments, so the reader and
+        buffer bookkeeping are inlined.
+        """
+        view = self._view
+        size = len(self._buffer)
+        readline = reader._f.readline
+        delimiter = None
+        while reader._remaining > 0:
+            line = readline(min(reader._remaining, MAX_LINE))
+            if not line:
+                break
+            reader._remaining -= len(line)
+            starts = reader.at_line_start
+            reader.at_line_start = line[-1:] == b"\n"
+            # "-" is not in the base64 alphabet, so only those lines can be delimiters
+            if starts and line[:2] == b"--":
+                delimiter = _delimiter(line, boundaries)
+                if delimiter:
+                    break
+            data = line.translate(None, _BASE64_IGNORED)
+            used = self._used
+            if used + len(data) < size:
+                view[used:used + len(data)] = data
+                self._used = used + len(data)
+            else:
+                self.feed(data)
+        self.finish()
+        return delimiter
+
+    def _flush(self, final):
+        usable = self._used if final else self._used - self._used % 4
+        if usable:
+            chunk = self._view[:usable]
+            try:
+                self.out.write(binascii.a2b_base64(chunk))
+            except binascii.Error:
+                # Tolerate missing padding at the very end, as the email package does
+                self.out.write(binascii.a2b_base64(bytes(chunk) + b"=" * (-usable % 4)))
+        rest = self._used - usable
+        self._view[:rest] = self._view[usable:self._used]
+        self._used = rest
+
+    def finish(self):
+        self._flush(final=True)
+
+class LineDecoder:
+    """
+    Decode quoted-printable or unencoded bodies line by line
+
+    The line break before a MIME delimiter belongs to the delimiter, so
+    each line's ending is held back until the next line arrives.
+    """
+    def __init__(self, out, quoted_printable):
+        self.out = out
+        self.quoted_printable = quoted_printable
+        self._pending = b""
+
+    def feed(self, line):
+        if line.endswith(b"\r\n"):
+            body, ending = line[:-2], b"\r\n"
+        elif line.endswith(b"\n"):
+            body, ending = line[:-1], b"\n"
+        else:
+            body, ending = line, b""
+        if self.quoted_printable:
+            if body.endswith(b"="):
+                # Soft line break
+                ending = b""
+            body = binascii.a2b_qp(body)
+        self.out.write(self._pending + body)
+        self._pending = ending
+
+    def finish(self):
+        self._pending = b""
+
+def _skip_body(reader, boundaries):
+    while True:
+        line, starts = reader.next_line()
+        if not line:
+            return None
+        if starts:
+            delimiter = _delimiter(line, boundaries)
+            if delimiter:
+                return delimiter
+
+def _decode_body(reader, boundaries, encoding, out):
+    if encoding == "base64":
+        return Base64ChunkDecoder(out).decode_from(reader, boundaries)
+
+    decoder = LineDecoder(out, encoding == "quoted-printable")
+
+    while True:
+        line, starts = reader.next_line()
+        if not line:
+            delimiter = None
+            break
+        if starts:
+            delimiter = _delimiter(line, boundaries)
+            if delimiter:
+                break
+        decoder.feed(line)
+    decoder.finish()
+    return delimiter
+
+class _PartSink:
+    """
+    Collects a message's attachments as temp files in tmp_dir
+    """
+    def __init__(self, tmp_dir):
+        self.tmp_dir = tmp_dir
+        self.parts = []
+
+    def write(self, filename, headers, reader, boundaries):
+        encoding = str(headers.get("Content-Transfer-Encoding", "7bit")).strip().lower()
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=".part")
+        with os.fdopen(fd, "wb") as out:
+            delimiter = _decode_body(reader, boundaries, encoding, out)
+            size = out.tell()
+        self.parts.append((filename, tmp_path, size))
+        return delimiter
+
+def _stream_entity(reader, headers, boundaries, sink):
+    """
+    Consume one MIME entity's body; returns the delimiter that ended it,
+    or None at the end of the message
+    """
+    if headers.get_content_maintype() == "multipart":
+        boundary = headers.get_boundary()
+        if boundary:
+            return _stream_multipart(reader, boundary.encode("utf-8", "surrogateescape"), boundaries, sink)
+
+    encoding = str(headers.get("Content-Transfer-Encoding", "7bit")).strip().lower()
+    if headers.get_content_type() == "message/rfc822" and encoding not in ("base64", "quoted-printable"):
+        # Forwarded message: look for attachments inside it
+        return _stream_entity(reader, read_headers(reader), boundaries, sink)
+
+    filename = headers.get_filename()
+    if filename or headers.get_content_disposition() == "attachment":
+        return sink.write(filename or "attachment", headers, reader, boundaries)
+    return _skip_body(reader, boundaries)
+
+def _stream_multipart(reader, boundary, boundaries, sink):
+    boundaries = boundaries + (boundary,)
+    delimiter = _skip_body(reader, boundaries)  # preamble
+    while delimiter is not None:
+        found, closing = delimiter
+        if found != boundary:
+            # An enclosing part ended early; let it handle the delimiter
+            return delimiter
+        if closing:
+            # The epilogue runs to the enclosing part's next delimiter
+            return _skip_body(reader, boundaries[:-1])
+        delimiter = _stream_entity(reader, read_headers(reader), boundaries, sink)
+    return None
+
+def decode_message(path, offset, length, tmp_dir):
+    """
+    Stream one message from path and decode its attachments to temp files
+
+    Returns (sender, date, [(filename, tmp_path, size)]), which is
+    everything the writer needs to name and move the files into place.
+    """
+    sink = _PartSink(tmp_dir)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        reader = SpanReader(f, length)
+        headers = read_headers(reader)
+        _stream_entity(reader, headers, (), sink)
+    return message_sender(headers), message_date(headers), sink.parts
+
+class DecodeError(Exception):
+    pass
+
+def decode_or_error(path, offset, length, tmp_dir):
+    """
+    decode_message, returning a DecodeError instead of raising so one
+    malformed message doesn't stop a run (or a worker's whole batch)
+    """
+    try:
+        return decode_message(path, offset, length, tmp_dir)
+    except Exception as e:
+        # Plain message only: arbitrary exceptions may not pickle back from a worker
+        return DecodeError(f"{type(e).__name__}: {e}")
+
+def decode_batch(spans, tmp_dir):
+    return [decode_or_error(path, offset, length, tmp_dir) for path, offset, length in spans]
+
+def _truncate_utf8(text, max_bytes):
+    return text.encode("utf-8", "surrogateescape")[:max_bytes].decode("utf-8", "ignore")
+
+def fit_name(name, suffix=""):
+    """
+    name with suffix inserted before the extension, shortening the stem
+    (like Chrome does) so the result fits in MAX_NAME_BYTES; control
+    characters are dropped
+    """
+    name = _CONTROL_CHARS.sub("", name) or "unnamed"
+    stem, ext = os.path.splitext(name)
+    budget = MAX_NAME_BYTES - len(f"{suffix}{ext}".encode("utf-8", "surrogateescape"))
+    if budget < 1:
+        # An absurdly long "extension" isn't worth keeping
+        stem, ext = name, ""
+        budget = MAX_NAME_BYTES - len(suffix.encode("utf-8", "surrogateescape"))
+    return f"{_truncate_utf8(stem, budget)}{suffix}{ext}"
+
+def unique_path(directory, name):
+    """
+    Pick a free path for name, adding " (n)" before the extension like
+    Chrome's download uniquifier
+    """
+    path = os.path.join(directory, fit_name(name))
+    if not os.path.exists(path):
+        return path
+    n = 1
+    while True:
+        path = os.path.join(directory, fit_name(name, f" ({n})"))
+        if not os.path.exists(path):
+            return path
+        n += 1
+
+class AttachmentWriter:
+    """
+    Names decoded attachments and moves them into place, strictly in
+    mailbox order
+
+    Keeping naming and collision resolution in one place is what makes
+    parallel runs produce the same files as serial ones: the generic-name
+    sequence counter and the " (n)" suffixes both depend on order. Files
+    are decoded to temp names first, so a rename is the only visible step.
+    """
+    def __init__(self, output_dir, plan, log=print, index=None, dedup="off", counter=None):
+        self.output_dir = output_dir
+        self.plan = plan
+        self.log = log
+        self.index = index
+        self.dedup = dedup
+        self.counter = counter or SequenceCounter()
+        self.stats = {"messages": 0, "attachments": 0, "bytes": 0, "duplicates": 0, "duplicate_bytes": 0,
+                      "failed_attachments": 0}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write_message(self, decoded):
+        """
+        Name and move one decoded message's attachments into place;
+        returns the paths written
+        """
+        sender, date, parts = decoded
+        written = []
+        names = [filename for filename, _, _ in parts]
+        self.stats["messages"] += 1
+        for filename, tmp_path, size in parts:
+            # Render before deduplicating so sequence numbers don't depend on --dedup
+            name = self.plan.render({
+                "filename": filename,
+                "sender": sender,
+                "date": date,
+                "attachment_filenames": names
+            }, self.counter)
+            try:
+                path = self._write_part(tmp_path, name, size)
+            except (OSError, ValueError) as e:
+                # Skip this attachment, not the rest of the run
+                self.stats["failed_attachments"] += 1
+                print(f"Could not write {name!r}: {e}", file=sys.stderr)
+                continue
+            if path is not None:
+                written.append(path)
+        return written
+
+    def _write_part(self, tmp_path, name, size):
+        self.stats["attachments"] += 1
+        self.stats["bytes"] += size
+
+        key = None
+        if self.index is not None:
+            existing, key = self.index.find_duplicate(tmp_path, size)
+            if existing is not None:
+                return self._write_duplicate(tmp_path, name, existing, size)
+
+        path = unique_path(self.output_dir, name)
+        os.replace(tmp_path, path)
+        if self.index is not None:
+            self.index.add(path, key)
+        if self.log:
+            self.log(os.path.basename(path))
+        return path
+
+    def _write_duplicate(self, tmp_path, name, existing, size):
+        self.stats["duplicates"] += 1
+        self.stats["duplicate_bytes"] += size
+        if self.dedup == "skip":
+            os.remove(tmp_path)
+            if self.log:
+                self.log(f"{name} (duplicate of {os.path.basename(existing)}, skipped)")
+            return None
+
+        path = unique_path(self.output_dir, name)
+        try:
+            os.link(existing, path)
+            os.remove(tmp_path)
+        except OSError:
+            # Different filesystem or no hard link support: keep the copy
+            os.replace(tmp_path, path)
+        if self.log:
+            self.log(f"{os.path.basename(path)} (linked to {os.path.basename(existing)})")
+        return path
+
+def iter_batches(spans, batch_size):
+    batch = []
+    for span in spans:
+        batch.append(span)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def decode_parallel(spans, tmp_dir, jobs, batch_size=16, window=4):
+    """
+    Yield decode_message results in input order using a process pool
+
+    Workers read their messages straight from the source file, so only
+    offsets and small results cross process boundaries. At most
+    jobs * window batches are in flight.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for batch in iter_batches(spans, batch_size):
+            pending.append(pool.submit(decode_batch, batch, tmp_dir))
+            if len(pending) >= jobs * window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def peak_rss_kb(who=None):
+    """
+    Peak resident set size in KiB for this process (or its children)
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who is None else who)
+    # macOS reports bytes, Linux KiB
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+def extract(source, output_dir, pattern=DEFAULT_PATTERN, date_format=DEFAULT_DATE_FORMAT, log=print, jobs=1,
+            dedup="off", index_path=None, journal_path=None, incremental=False, restart=False):
+    """
+    Extract and rename every attachment in source; returns a stats dict
+    including throughput and peak memory
+
+    dedup is "off", "skip" (don't write files whose content is already
+    indexed) or "link" (hard-link them to the first copy). Messages
+    already in the journal are skipped; with incremental, an mbox is only
+    read from where the journal left off. restart discards the journal.
+    """
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    journal_path = journal_path or os.path.join(output_dir, JOURNAL_NAME)
+    if restart:
+        ExtractionJournal.reset(journal_path)
+    index = None
+    if dedup != "off":
+        index = AttachmentIndex(index_path or os.path.join(output_dir, INDEX_NAME))
+    # The index is made durable before every journal fsync
+    journal = ExtractionJournal(journal_path, on_sync=index.sync if index is not None else None)
+    writer = AttachmentWriter(output_dir, compile_pattern(pattern, date_format), log, index, dedup,
+                              SequenceCounter(journal.counter))
+    writer.stats["skipped_messages"] = 0
+    writer.stats["failed_messages"] = 0
+    tmp_dir = os.path.join(output_dir, TMP_DIR_NAME)
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    start_offset = 0
+    if incremental and not os.path.isdir(source):
+        start_offset = resume_offset(source, journal.high_water(source))
+    writer.stats["start_offset"] = start_offset
+
+    # Spans handed to the decoder, in order, waiting for their result
+    in_flight = deque()
+
+    def pending_spans():
+        for span in iter_messages(source, start_offset):
+            if journal.is_done(*span):
+                writer.stats["skipped_messages"] += 1
+                continue
+            in_flight.append(span)
+            yield span
+
+    try:
+        if jobs > 1:
+            decoded = decode_parallel(pending_spans(), tmp_dir, jobs)
+        else:
+            decoded = (decode_or_error(path, offset, length, tmp_dir) for path, offset, length in pending_spans())
+
+        for message in decoded:
+            path, offset, length = in_flight.popleft()
+            if isinstance(message, DecodeError):
+                # Journalled as failed so the next run tries it again
+                journal.record_failure(path, offset, length)
+                writer.stats["failed_messages"] += 1
+                print(f"Could not decode the message at byte {offset} of {path}: {message}", file=sys.stderr)
+                continue
+            written = writer.write_message(message)
+            if index is not None:
+                # The message's files must be in the index before the journal marks it done
+                index.commit()
+            journal.record(path, offset, length, written, writer.counter.value)
+    finally:
+        journal.close()
+        # Anything left here belongs to a message that was never written
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if index is not None:
+            index.close()
+
+    stats = writer.stats
+    stats["seconds"] = time.perf_counter() - started
+    stats["bytes_per_second"] = stats["bytes"] / stats["seconds"] if stats["seconds"] else 0.0
+    stats["peak_rss_kb"] = peak_rss_kb()
+    if jobs > 1 and resource is not None:
+        stats["worker_peak_rss_kb"] = peak_rss_kb(resource.RUSAGE_CHILDREN)
+    return stats
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract and rename email attachments from an mbox file or .eml folder")
+    parser.add_argument("source", help="mbox file or directory of .eml files")
+    parser.add_argument("output", help="directory to write renamed attachments to")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN)
+    parser.add_argument("--date-format", default=DEFAULT_DATE_FORMAT)
+    parser.add_argument("--quiet", action="store_true", help="don't list each written file")
+    parser.add_argument("--jobs", type=int, default=1, help="decode messages in this many processes")
+    parser.add_argument("--dedup", choices=["off", "skip", "link"], default="off",
+                        help="skip or hard-link attachments whose content was already extracted")
+    parser.add_argument("--index", help=f"dedup index file (default: OUTPUT/{INDEX_NAME})")
+    parser.add_argument("--journal", help=f"checkpoint journal file (default: OUTPUT/{JOURNAL_NAME})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only read an mbox from where the last run stopped")
+    parser.add_argument("--restart", action="store_true", help="discard the journal and extract everything again")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    stats = extract(args.source, args.output, args.pattern, args.date_format,
+                    log=None if args.quiet else print, jobs=args.jobs,
+                    dedup=args.dedup, index_path=args.index, journal_path=args.journal,
+                    incremental=args.incremental, restart=args.restart)
+    if stats["skipped_messages"] or stats["start_offset"]:
+        print(f"Resumed at byte {stats['start_offset']}, skipped {stats['skipped_messages']} "
+              f"already extracted messages")
+    print(f"{stats['attachments']} attachments from {stats['messages']} messages "
+          f"({stats['bytes']} bytes) in {stats['seconds']:.1f}s, "
+          f"{stats['bytes_per_second'] / 1e6:.1f} MB/s")
+    if stats["failed_messages"] or stats["failed_attachments"]:
+        print(f"{stats['failed_messages']} messages could not be decoded and "
+              f"{stats['failed_attachments']} attachments could not be written (see above)")
+    if args.dedup != "off":
+        print(f"{stats['duplicates']} duplicates ({stats['duplicate_bytes']} bytes) {'skipped' if args.dedup == 'skip' else 'hard-linked'}")
+    if stats["peak_rss_kb"] is not None:
+        workers = f", workers {stats['worker_peak_rss_kb'] / 1024:.1f} MiB" if "worker_peak_rss_kb" in stats else ""
+        print(f"Peak memory: {stats['peak_rss_kb'] / 1024:.1f} MiB{workers}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
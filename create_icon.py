@@ -1,9 +1,32 @@
+"""
+Extension icon generator.
+
+    python create_icon.py                          # icons/icon16.png, icon48.png, icon128.png
+    python create_icon.py --sizes 16 32 48 128 --ico icons/icon.ico
+
+The shapes are drawn once, on a canvas several times larger than the
+biggest size requested, and every size is downsampled from that single
+render so small icons keep smooth edges.
+
+    from create_icon import create_icons
+    images = create_icons([16, 48, 128], output_dir=None)
+
+With --backend numpy the shapes are rasterized by numpy_raster.py, which
+anti-aliases them directly and can draw many colour variants at once
+(see bench_raster.py).
+"""
 from PIL import Image, ImageDraw
-import math
+import argparse
+import os
+
+import numpy_raster
 
-# Create a new 128x128 image with a transparent background
-img = Image.new('RGBA', (128, 128), color=(0, 0, 0, 0))
-draw = ImageDraw.Draw(img)
+# Coordinates below are in a 128x128 design space
+DESIGN_SIZE = 128
+DEFAULT_SIZES = (16, 48, 128)
+SUPERSAMPLE = 4
+# Largest size the ICO format stores
+MAX_ICO_SIZE = 256
 
 # Define colors
 primary_color = (66, 133, 244)  # Google blue
@@ -11,72 +34,131 @@ secondary_color = (234, 67, 53)  # Google red
 accent_color = (251, 188, 5)    # Google yellow
 bg_color = (255, 255, 255, 240)  # Slightly transparent white
 
+DEFAULT_PALETTE = {
+    'background': bg_color,
+    'envelope': primary_color,
+    'flap': secondary_color,
+    'clip': accent_color,
+    'arrow': (255, 255, 255),
+}
+
 # Draw a rounded rectangle background
-def rounded_rectangle(xy, radius, fill=None, outline=None):
+def rounded_rectangle(draw, xy, radius, fill=None, outline=None):
+    if isinstance(draw, numpy_raster.Canvas):
+        # One anti-aliased mask instead of six overlapping shapes
+        draw.rounded_rectangle(xy, radius, fill=fill, outline=outline)
+        return
+
     x0, y0, x1, y1 = xy
     diameter = radius * 2
-    
+
     # Draw the rectangle
     draw.rectangle([(x0, y0 + radius), (x1, y1 - radius)], fill=fill, outline=outline)
     draw.rectangle([(x0 + radius, y0), (x1 - radius, y1)], fill=fill, outline=outline)
-    
+
     # Draw the corners
     draw.pieslice([(x0, y0), (x0 + diameter, y0 + diameter)], 180, 270, fill=fill, outline=outline)
     draw.pieslice([(x1 - diameter, y0), (x1, y0 + diameter)], 270, 360, fill=fill, outline=outline)
     draw.pieslice([(x0, y1 - diameter), (x0 + diameter, y1)], 90, 180, fill=fill, outline=outline)
     draw.pieslice([(x1 - diameter, y1 - diameter), (x1, y1)], 0, 90, fill=fill, outline=outline)
 
-# Apply the rounded rectangle
-rounded_rectangle((14, 14, 114, 114), 16, fill=bg_color)
-
-# Draw email icon base (envelope shape)
-email_points = [
-    (24, 38),      # Top-left
-    (104, 38),     # Top-right
-    (104, 90),     # Bottom-right
-    (24, 90)       # Bottom-left
-]
-draw.polygon(email_points, fill=primary_color)
-
-# Add envelope flap
-flap_points = [
-    (24, 38),      # Top-left
-    (104, 38),     # Top-right
-    (64, 62)       # Bottom-middle
-]
-draw.polygon(flap_points, fill=secondary_color)
-
-# Draw attachment icon (paper clip)
-clip_width = 12
-clip_height = 38
-clip_x = 76
-clip_y = 70
-
-# Draw stylized attachment/arrow
-draw.rectangle((clip_x, clip_y - 20, clip_x + clip_width, clip_y + clip_height - 20), 
-              fill=accent_color, outline=None)
-
-# Draw arrow for "download/rename" concept
-arrow_width = 28
-arrow_height = 20
-arrow_x = 34
-arrow_y = 80
-
-arrow_points = [
-    (arrow_x, arrow_y - arrow_height/2),                # Top
-    (arrow_x + arrow_width/2, arrow_y + arrow_height/2),  # Bottom-right
-    (arrow_x - arrow_width/2, arrow_y + arrow_height/2)   # Bottom-left
-]
-draw.polygon(arrow_points, fill=(255, 255, 255))
-
-# Save the image
-img.save('icons/icon128.png')
-
-# Create smaller versions
-img_48 = img.resize((48, 48), Image.Resampling.LANCZOS)
-img_48.save('icons/icon48.png')
-
-img_16 = img.resize((16, 16), Image.Resampling.LANCZOS)
-img_16.save('icons/icon16.png')
-
-print("Icon files created successfully!")
+def draw_icon(draw, scale, palette=DEFAULT_PALETTE):
+    """
+    Draw the icon shapes, scaling design coordinates by scale; draw is an
+    ImageDraw or a numpy_raster.Canvas (whose palette colours may be
+    per-image arrays)
+    """
+    def points(*design_points):
+        return [(x * scale, y * scale) for x, y in design_points]
+
+    # Apply the rounded rectangle
+    rounded_rectangle(draw, [value * scale for value in (14, 14, 114, 114)], 16 * scale, fill=palette['background'])
+
+    # Draw email icon base (envelope shape)
+    draw.polygon(points(
+        (24, 38),      # Top-left
+        (104, 38),     # Top-right
+        (104, 90),     # Bottom-right
+        (24, 90)       # Bottom-left
+    ), fill=palette['envelope'])
+
+    # Add envelope flap
+    draw.polygon(points(
+        (24, 38),      # Top-left
+        (104, 38),     # Top-right
+        (64, 62)       # Bottom-middle
+    ), fill=palette['flap'])
+
+    # Draw attachment icon (paper clip)
+    clip_width = 12
+    clip_height = 38
+    clip_x = 76
+    clip_y = 70
+
+    # Draw stylized attachment/arrow
+    draw.rectangle(points((clip_x, clip_y - 20), (clip_x + clip_width, clip_y + clip_height - 20)),
+                  fill=palette['clip'], outline=None)
+
+    # Draw arrow for "download/rename" concept
+    arrow_width = 28
+    arrow_height = 20
+    arrow_x = 34
+    arrow_y = 80
+
+    draw.polygon(points(
+        (arrow_x, arrow_y - arrow_height/2),                # Top
+        (arrow_x + arrow_width/2, arrow_y + arrow_height/2),  # Bottom-right
+        (arrow_x - arrow_width/2, arrow_y + arrow_height/2)   # Bottom-left
+    ), fill=palette['arrow'])
+
+def render_icon(size, backend='pil'):
+    """
+    The icon drawn directly at size x size pixels
+    """
+    if backend == 'numpy':
+        canvas = numpy_raster.Canvas((size, size))
+        draw_icon(canvas, size / DESIGN_SIZE)
+        return canvas.to_images()[0]
+    img = Image.new('RGBA', (size, size), color=(0, 0, 0, 0))
+    draw_icon(ImageDraw.Draw(img), size / DESIGN_SIZE)
+    return img
+
+def create_icons(sizes=DEFAULT_SIZES, output_dir='icons', ico_path=None, supersample=SUPERSAMPLE, backend='pil'):
+    """
+    Render the icon once and downsample it to every size; returns
+    {size: image} and, when output_dir is given, saves icon<size>.png
+    there (and an .ico with the sizes it can hold to ico_path)
+    """
+    sizes = sorted(set(sizes))
+    master = render_icon(sizes[-1] * supersample, backend)
+    images = {size: master.resize((size, size), Image.Resampling.LANCZOS) for size in sizes}
+
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        for size, img in images.items():
+            img.save(os.path.join(output_dir, f'icon{size}.png'))
+
+    if ico_path is not None:
+        ico_sizes = [size for size in sizes if size <= MAX_ICO_SIZE]
+        if not ico_sizes:
+            raise ValueError(f"ICO files hold sizes up to {MAX_ICO_SIZE}px")
+        largest = images[ico_sizes[-1]]
+        largest.save(ico_path, format='ICO', sizes=[(size, size) for size in ico_sizes],
+                     append_images=[images[size] for size in ico_sizes[:-1]])
+    return images
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Create the extension icons")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--output', default='icons', help="directory for icon<size>.png files")
+    parser.add_argument('--ico', help="also write a multi-size .ico file here")
+    parser.add_argument('--supersample', type=int, default=SUPERSAMPLE,
+                        help="draw at this multiple of the largest size before downsampling")
+    parser.add_argument('--backend', choices=['pil', 'numpy'], default='pil',
+                        help="rasterize with ImageDraw or with numpy_raster (needs numpy)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    create_icons(args.sizes, args.output, args.ico, args.supersample, args.backend)
+    print("Icon files created successfully!")
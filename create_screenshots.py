@@ -1,8 +1,34 @@
+"""
+Chrome Web Store screenshots for the extension.
+
+    python create_screenshots.py                      # rebuild what changed, in parallel
+    python create_screenshots.py --locales locales.json
+    python create_screenshots.py --force --jobs 1
+
+Each scene's inputs (the code that draws it, colours, font files,
+Pillow version and translated strings) are hashed and recorded in
+screenshots/.build_manifest.json with the hash of the PNG written for
+them. A scene is only rendered again when its inputs changed or its
+PNG no longer matches. A locales file maps a locale to translations of
+the English texts, {"de": {"Downloads": "Downloads", ...}}; each
+locale is written to screenshots/<locale>/.
+"""
 from PIL import Image, ImageDraw, ImageFont
+import PIL
+import argparse
+import functools
+import hashlib
+import inspect
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-# Create screenshots directory if it doesn't exist
-os.makedirs('screenshots', exist_ok=True)
+OUTPUT_DIR = 'screenshots'
+MANIFEST_NAME = '.build_manifest.json'
+FONT_FILES = ("Arial.ttf", "Arial Bold.ttf")
+# Bump to force every scene to be rebuilt
+BUILD_VERSION = 1
 
 # Define colors
 GMAIL_BG = (255, 255, 255)
@@ -15,6 +41,30 @@ GMAIL_BORDER = (218, 220, 224)
 GMAIL_BLUE = (66, 133, 244)
 GMAIL_FOLDER = (241, 243, 244)
 
+@functools.lru_cache(maxsize=None)
+def _default_font():
+    return ImageFont.load_default()
+
+# Every face is loaded from disk once per size and shared by all screenshots
+@functools.lru_cache(maxsize=None)
+def get_font(name, size):
+    if not os.path.exists(name):
+        return _default_font()
+    return ImageFont.truetype(name, size)
+
+# Translations for the locale being rendered (English texts map to themselves)
+_strings = {}
+
+def translate(text):
+    return _strings.get(text, text)
+
+class LocalizedDraw(ImageDraw.ImageDraw):
+    """
+    ImageDraw that writes every text in the current locale
+    """
+    def text(self, xy, text, *args, **kwargs):
+        return super().text(xy, translate(text), *args, **kwargs)
+
 # Helper function to create rounded rectangle
 def rounded_rectangle(draw, xy, radius, fill=None, outline=None):
     x0, y0, x1, y1 = xy
@@ -36,12 +86,12 @@ def create_gmail_email(draw, x, y, width, height, from_name, from_email, subject
     rounded_rectangle(draw, (x, y, x + width, y + height), 8, fill=GMAIL_BG, outline=GMAIL_BORDER)
     
     # Sender info
-    font_sender = ImageFont.truetype("Arial.ttf", 14) if os.path.exists("Arial.ttf") else ImageFont.load_default()
+    font_sender = get_font("Arial.ttf", 14)
     draw.text((x + 20, y + 20), from_name, fill=GMAIL_TEXT, font=font_sender)
-    draw.text((x + 20 + len(from_name) * 8, y + 20), f" <{from_email}>", fill=GMAIL_LIGHT_TEXT, font=font_sender)
+    draw.text((x + 20 + len(translate(from_name)) * 8, y + 20), f" <{from_email}>", fill=GMAIL_LIGHT_TEXT, font=font_sender)
     
     # Subject
-    font_subject = ImageFont.truetype("Arial Bold.ttf", 16) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default()
+    font_subject = get_font("Arial Bold.ttf", 16)
     draw.text((x + 20, y + 50), subject, fill=GMAIL_TEXT, font=font_subject)
     
     # Date
@@ -60,7 +110,7 @@ def create_gmail_email(draw, x, y, width, height, from_name, from_email, subject
     draw.rectangle((att_x + 15, att_y + 15, att_x + 35, att_y + 45), fill=GMAIL_BLUE)
     
     # Attachment name
-    font_att = ImageFont.truetype("Arial.ttf", 13) if os.path.exists("Arial.ttf") else ImageFont.load_default()
+    font_att = get_font("Arial.ttf", 13)
     draw.text((att_x + 50, att_y + 20), attachment_name, fill=GMAIL_TEXT, font=font_att)
     draw.text((att_x + 50, att_y + 38), "137 KB", fill=GMAIL_LIGHT_TEXT, font=font_att)
     
@@ -77,14 +127,14 @@ def create_gmail_email(draw, x, y, width, height, from_name, from_email, subject
 
 # Function to create notification
 def create_notification(draw, x, y, message, is_success=True):
-    width = len(message) * 7 + 40
+    width = len(translate(message)) * 7 + 40
     height = 40
     color = (76, 175, 80) if is_success else (244, 67, 54)  # Green for success, Red for error
     
     rounded_rectangle(draw, (x, y, x + width, y + height), 4, fill=color)
     
-    font = ImageFont.truetype("Arial.ttf", 14) if os.path.exists("Arial.ttf") else ImageFont.load_default()
-    text_width = len(message) * 7
+    font = get_font("Arial.ttf", 14)
+    text_width = len(translate(message)) * 7
     text_x = x + (width - text_width) // 2
     draw.text((text_x, y + 12), message, fill=(255, 255, 255), font=font)
 
@@ -98,11 +148,11 @@ def create_downloaded_files(draw, x, y, filenames):
     
     # Header
     draw.rectangle((x, y, x + width, y + 40), fill=(240, 240, 240))
-    font_header = ImageFont.truetype("Arial Bold.ttf", 14) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default()
+    font_header = get_font("Arial Bold.ttf", 14)
     draw.text((x + 20, y + 12), "Downloads", fill=GMAIL_TEXT, font=font_header)
     
     # Files
-    font_file = ImageFont.truetype("Arial.ttf", 13) if os.path.exists("Arial.ttf") else ImageFont.load_default()
+    font_file = get_font("Arial.ttf", 13)
     
     for i, filename in enumerate(filenames):
         file_y = y + 50 + i * 40
@@ -118,25 +168,25 @@ def create_downloaded_files(draw, x, y, filenames):
         }.get(icon_type, (158, 158, 158))  # Grey for others
         
         draw.rectangle((x + 20, file_y + 5, x + 45, file_y + 30), fill=icon_color)
-        draw.text((x + 27, file_y + 8), icon_type.upper()[:3], fill=(255, 255, 255), font=ImageFont.truetype("Arial Bold.ttf", 10) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default())
+        draw.text((x + 27, file_y + 8), icon_type.upper()[:3], fill=(255, 255, 255), font=get_font("Arial Bold.ttf", 10))
         
         # Filename
         draw.text((x + 60, file_y + 10), filename, fill=GMAIL_TEXT, font=font_file)
 
 # Create screenshot 1: Before and after comparison
-def create_screenshot1():
+def create_screenshot1(output_dir=OUTPUT_DIR):
     # Create a 1280x800 image
     img = Image.new('RGB', (1280, 800), color=GMAIL_BG)
-    draw = ImageDraw.Draw(img)
+    draw = LocalizedDraw(img)
     
     # Draw a Gmail-like header
     draw.rectangle((0, 0, 1280, 60), fill=GMAIL_HEADER)
     
     # Gmail logo (simplified)
-    draw.text((30, 20), "Gmail", fill=GMAIL_RED, font=ImageFont.truetype("Arial Bold.ttf", 20) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default())
+    draw.text((30, 20), "Gmail", fill=GMAIL_RED, font=get_font("Arial Bold.ttf", 20))
     
     # Title
-    font_title = ImageFont.truetype("Arial Bold.ttf", 24) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default()
+    font_title = get_font("Arial Bold.ttf", 24)
     draw.text((400, 100), "Before AttachFlow", fill=GMAIL_TEXT, font=font_title)
     draw.text((900, 100), "After AttachFlow", fill=GMAIL_TEXT, font=font_title)
     
@@ -166,20 +216,20 @@ def create_screenshot1():
     ])
     
     # Save the image
-    img.save('screenshots/comparison.png')
+    img.save(os.path.join(output_dir, 'comparison.png'))
     print("Created screenshot 1: comparison.png")
 
 # Create screenshot 2: Download process
-def create_screenshot2():
+def create_screenshot2(output_dir=OUTPUT_DIR):
     # Create a 1280x800 image
     img = Image.new('RGB', (1280, 800), color=GMAIL_BG)
-    draw = ImageDraw.Draw(img)
+    draw = LocalizedDraw(img)
     
     # Draw a Gmail-like header
     draw.rectangle((0, 0, 1280, 60), fill=GMAIL_HEADER)
     
     # Gmail logo (simplified)
-    draw.text((30, 20), "Gmail", fill=GMAIL_RED, font=ImageFont.truetype("Arial Bold.ttf", 20) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default())
+    draw.text((30, 20), "Gmail", fill=GMAIL_RED, font=get_font("Arial Bold.ttf", 20))
     
     # Create multiple Gmail emails with attachments to show different cases
     create_gmail_email(draw, 150, 100, 800, 180, "Sarah Johnson", "sarah.j@example.com", 
@@ -196,17 +246,17 @@ def create_screenshot2():
     create_notification(draw, 600, 420, "Download complete: 2023-03-18_developers@tech.com_User_Manual_v1.docx")
     
     # Save the image
-    img.save('screenshots/multiple_downloads.png')
+    img.save(os.path.join(output_dir, 'multiple_downloads.png'))
     print("Created screenshot 2: multiple_downloads.png")
 
 # Create screenshot 3: Settings/options
-def create_screenshot3():
+def create_screenshot3(output_dir=OUTPUT_DIR):
     # Create a 1280x800 image 
     img = Image.new('RGB', (1280, 800), color=GMAIL_BG)
-    draw = ImageDraw.Draw(img)
+    draw = LocalizedDraw(img)
     
     # Title
-    font_title = ImageFont.truetype("Arial Bold.ttf", 26) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default()
+    font_title = get_font("Arial Bold.ttf", 26)
     draw.text((400, 80), "AttachFlow Options", fill=GMAIL_TEXT, font=font_title)
     
     # Options panel
@@ -219,11 +269,11 @@ def create_screenshot3():
     
     # Options header
     draw.rectangle((panel_x, panel_y, panel_x + panel_width, panel_y + 60), fill=GMAIL_BLUE)
-    font_header = ImageFont.truetype("Arial Bold.ttf", 18) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default()
+    font_header = get_font("Arial Bold.ttf", 18)
     draw.text((panel_x + 30, panel_y + 18), "Filename Pattern Settings", fill=(255, 255, 255), font=font_header)
     
     # Pattern option
-    font_option = ImageFont.truetype("Arial.ttf", 16) if os.path.exists("Arial.ttf") else ImageFont.load_default()
+    font_option = get_font("Arial.ttf", 16)
     draw.text((panel_x + 30, panel_y + 100), "Filename Pattern:", fill=GMAIL_TEXT, font=font_option)
     
     # Pattern textbox
@@ -236,7 +286,7 @@ def create_screenshot3():
     # Available variables
     draw.text((panel_x + 30, panel_y + 200), "Available Variables:", fill=GMAIL_TEXT, font=font_option)
     
-    font_vars = ImageFont.truetype("Arial.ttf", 14) if os.path.exists("Arial.ttf") else ImageFont.load_default()
+    font_vars = get_font("Arial.ttf", 14)
     variables = [
         "YYYY-MM-DD - Date of the email",
         "SenderName - Email address of the sender",
@@ -265,20 +315,20 @@ def create_screenshot3():
              fill=(255, 255, 255), font=font_option)
     
     # Save the image
-    img.save('screenshots/options.png')
+    img.save(os.path.join(output_dir, 'options.png'))
     print("Created screenshot 3: options.png")
 
 # Create screenshot 4: PDF Preview download
-def create_screenshot4():
+def create_screenshot4(output_dir=OUTPUT_DIR):
     # Create a 1280x800 image
     img = Image.new('RGB', (1280, 800), color=GMAIL_BG)
-    draw = ImageDraw.Draw(img)
+    draw = LocalizedDraw(img)
     
     # Draw a Gmail-like header
     draw.rectangle((0, 0, 1280, 60), fill=GMAIL_HEADER)
     
     # Gmail logo (simplified)
-    draw.text((30, 20), "Gmail", fill=GMAIL_RED, font=ImageFont.truetype("Arial Bold.ttf", 20) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default())
+    draw.text((30, 20), "Gmail", fill=GMAIL_RED, font=get_font("Arial Bold.ttf", 20))
     
     # Create a PDF preview dialog
     dialog_x = 280
@@ -295,7 +345,7 @@ def create_screenshot4():
     
     # PDF Header
     draw.rectangle((dialog_x, dialog_y, dialog_x + dialog_width, dialog_y + 50), fill=GMAIL_HEADER)
-    font_pdf_header = ImageFont.truetype("Arial Bold.ttf", 16) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default()
+    font_pdf_header = get_font("Arial Bold.ttf", 16)
     draw.text((dialog_x + 20, dialog_y + 15), "Contract_Agreement.pdf", fill=GMAIL_TEXT, font=font_pdf_header)
     
     # PDF Toolbar
@@ -316,8 +366,8 @@ def create_screenshot4():
         rounded_rectangle(draw, (button_x, button_y, button_x + button_width, button_y + 25), 
                         4, fill=button_color, outline=None)
         
-        font_button = ImageFont.truetype("Arial.ttf", 14) if os.path.exists("Arial.ttf") else ImageFont.load_default()
-        text_width = len(button) * 7
+        font_button = get_font("Arial.ttf", 14)
+        text_width = len(translate(button)) * 7
         draw.text((button_x + (button_width - text_width) // 2, button_y + 4), button, fill=text_color, font=font_button)
         
         # Add a highlight or attention marker to the download button
@@ -340,8 +390,8 @@ def create_screenshot4():
                  fill=(255, 255, 255))
     
     # Add simple contract-like content (lines of text)
-    font_pdf = ImageFont.truetype("Arial.ttf", 12) if os.path.exists("Arial.ttf") else ImageFont.load_default()
-    font_pdf_title = ImageFont.truetype("Arial Bold.ttf", 18) if os.path.exists("Arial Bold.ttf") else ImageFont.load_default()
+    font_pdf = get_font("Arial.ttf", 12)
+    font_pdf_title = get_font("Arial Bold.ttf", 18)
     
     # Contract title
     draw.text((pdf_content_x + 150, pdf_content_y + 40), "SERVICE AGREEMENT CONTRACT", fill=(0, 0, 0), font=font_pdf_title)
@@ -376,18 +426,137 @@ def create_screenshot4():
                       "Download complete: 2023-03-22_mary.jones@client.org_Contract_Agreement.pdf")
     
     # Add download info text
-    font_info = ImageFont.truetype("Arial.ttf", 16) if os.path.exists("Arial.ttf") else ImageFont.load_default()
+    font_info = get_font("Arial.ttf", 16)
     info_text = "AttachFlow successfully detects and renames PDF downloads from the preview viewer!"
     draw.text((dialog_x + 100, dialog_y + dialog_height + 80), info_text, fill=GMAIL_TEXT, font=font_info)
     
     # Save the image
-    img.save('screenshots/pdf_preview.png')
+    img.save(os.path.join(output_dir, 'pdf_preview.png'))
     print("Created screenshot 4: pdf_preview.png")
 
+SCENES = [
+    ("comparison.png", create_screenshot1),
+    ("multiple_downloads.png", create_screenshot2),
+    ("options.png", create_screenshot3),
+    ("pdf_preview.png", create_screenshot4),
+]
+
+# Code shared by every scene
+_SHARED_CODE = (get_font, translate, LocalizedDraw, rounded_rectangle, create_gmail_email,
+                create_notification, create_downloaded_files)
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def _shared_fingerprint():
+    digest = hashlib.sha256()
+    digest.update(f"{BUILD_VERSION} {PIL.__version__}".encode())
+    for func in _SHARED_CODE:
+        digest.update(inspect.getsource(func).encode())
+    for name, value in sorted(globals().items()):
+        if name.startswith('GMAIL_'):
+            digest.update(f"{name}={value!r}".encode())
+    for name in FONT_FILES:
+        digest.update(f"{name}:{_file_digest(name) if os.path.exists(name) else 'missing'}".encode())
+    return digest.hexdigest()
+
+def scene_inputs(scene, strings):
+    """
+    Hash of everything that can change what a scene draws
+    """
+    digest = hashlib.sha256(_shared_fingerprint().encode())
+    digest.update(inspect.getsource(scene).encode())
+    digest.update(json.dumps(strings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def render_scene(index, output_dir, strings):
+    """
+    Render one scene in the current process; returns (milliseconds taken,
+    fonts loaded, fonts reused)
+    """
+    global _strings
+    _strings = strings
+    fonts_before = get_font.cache_info()
+    start = time.perf_counter()
+    SCENES[index][1](output_dir)
+    elapsed = (time.perf_counter() - start) * 1000
+    fonts_after = get_font.cache_info()
+    return elapsed, fonts_after.misses - fonts_before.misses, fonts_after.hits - fonts_before.hits
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(path, manifest):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def build(locales=None, jobs=None, force=False, output_dir=OUTPUT_DIR):
+    """
+    Render every out-of-date scene for the default texts and each locale;
+    returns (rendered, skipped): (path, milliseconds, fonts loaded, fonts
+    reused) for each rendered scene and the paths that were up to date
+    """
+    variants = [(output_dir, {})]
+    for locale, strings in sorted((locales or {}).items()):
+        variants.append((os.path.join(output_dir, locale), strings))
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+
+    todo = []
+    skipped = []
+    for variant_dir, strings in variants:
+        for index, (filename, scene) in enumerate(SCENES):
+            path = os.path.join(variant_dir, filename)
+            inputs = scene_inputs(scene, strings)
+            recorded = manifest.get(path)
+            if (not force and recorded and recorded['inputs'] == inputs
+                    and os.path.exists(path) and _file_digest(path) == recorded['output']):
+                skipped.append(path)
+                continue
+            os.makedirs(variant_dir, exist_ok=True)
+            todo.append((path, inputs, index, variant_dir, strings))
+
+    rendered = []
+    if todo:
+        with ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(todo))) as pool:
+            futures = [(job, pool.submit(render_scene, *job[2:])) for job in todo]
+            for (path, inputs, *_), future in futures:
+                elapsed, fonts_loaded, fonts_reused = future.result()
+                manifest[path] = {'inputs': inputs, 'output': _file_digest(path)}
+                rendered.append((path, elapsed, fonts_loaded, fonts_reused))
+        save_manifest(manifest_path, manifest)
+    return rendered, skipped
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render the store screenshots")
+    parser.add_argument('--jobs', type=int, help="render in this many processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="render every scene even if up to date")
+    parser.add_argument('--locales', help="JSON file mapping locale -> {English text: translation}")
+    return parser.parse_args(argv)
+
 # Run the functions to create all screenshots
 if __name__ == "__main__":
-    create_screenshot1()
-    create_screenshot2()
-    create_screenshot3()
-    create_screenshot4()
-    print("All screenshots created in the 'screenshots' directory.")
+    args = parse_args()
+    locales = None
+    if args.locales:
+        with open(args.locales, encoding='utf-8') as f:
+            locales = json.load(f)
+    total_start = time.perf_counter()
+    rendered, skipped = build(locales, args.jobs, args.force)
+    for path, elapsed, *_ in rendered:
+        print(f"  {path}: {elapsed:.1f} ms")
+    print(f"Rendered {len(rendered)} screenshots, {len(skipped)} up to date, "
+          f"in {(time.perf_counter() - total_start) * 1000:.1f} ms.")
+    # Each worker process keeps its own font cache
+    print(f"Fonts loaded: {sum(entry[2] for entry in rendered)}, "
+          f"reused: {sum(entry[3] for entry in rendered)}")
@@ -0,0 +1,123 @@
+"""
+Checkpoint journal for resumable and incremental bulk extraction.
+
+Each fully written message is appended as one JSON line holding its
+span (source path, offset, length), the files written for it and the
+sequence counter afterwards. Every line is handed to the OS as soon as
+the message is written, so killing the process repeats at most the
+message in progress on the next run; fsync happens in batches, so only
+a power loss can cost the last batch.
+
+Messages are written in source order, so a file's journalled messages
+are everything before its high-water mark (the end of the last one)
+except spans that failed to decode, which get their own line and are
+retried on the next run. Memory therefore grows with the number of
+source files and failures, not messages, and checking whether a message
+is done is O(1).
+"""
+import json
+import os
+
+class ExtractionJournal:
+    """
+    Append-only record of messages already extracted into an output directory
+    """
+    def __init__(self, path, sync_every=64, on_sync=None):
+        self.path = path
+        self.sync_every = sync_every
+        # Called before each fsync, to make state the entries refer to durable first
+        self.on_sync = on_sync
+        self.counter = 0
+        self._messages = 0
+        self._high_water = {}
+        self._failed = set()
+        self._pending = 0
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        good = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                good += len(line)
+                self._remember(entry)
+        if good != os.path.getsize(self.path):
+            # Drop a line torn by a crash so new entries start cleanly
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    def _remember(self, entry):
+        if "failed" in entry:
+            self._failed.add(tuple(entry["failed"]))
+            return
+        path, offset, length = entry["span"]
+        self._failed.discard((path, offset, length))
+        self._high_water[path] = max(self._high_water.get(path, 0), offset + length)
+        self.counter = entry["counter"]
+        self._messages += 1
+
+    def __len__(self):
+        return self._messages
+
+    def is_done(self, path, offset, length):
+        path = os.path.abspath(path)
+        return offset + length <= self._high_water.get(path, 0) and (path, offset, length) not in self._failed
+
+    def high_water(self, path):
+        """
+        End offset of the last extracted message in an mbox file, or 0
+        """
+        return self._high_water.get(os.path.abspath(path), 0)
+
+    def record(self, path, offset, length, files, counter):
+        """
+        Mark a message as extracted; returns True when this call synced the journal
+        """
+        entry = {
+            "span": [os.path.abspath(path), offset, length],
+            "files": [os.path.basename(name) for name in files],
+            "counter": counter
+        }
+        return self._append(entry)
+
+    def record_failure(self, path, offset, length):
+        """
+        Note a message that could not be extracted, so it is not taken as
+        done once later messages move the high-water mark past it
+        """
+        return self._append({"failed": [os.path.abspath(path), offset, length]})
+
+    def _append(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self._remember(entry)
+        self._pending += 1
+        if self._pending >= self.sync_every:
+            self.sync()
+            return True
+        return False
+
+    def sync(self):
+        if self.on_sync is not None:
+            self.on_sync()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    @staticmethod
+    def reset(path):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,358 @@
+"""
+Python port of the extension's filename pattern logic (generateFilename,
+formatDate and sanitizeFilename in content.js) for bulk renaming jobs.
+
+A pattern such as "DateFormat_SenderName_OriginalFilename" is compiled
+once into a render plan and then applied to many attachment records:
+
+    plan = compile_pattern("DateFormat_SenderName_OriginalFilename", "YYYY-MM-DD")
+    names = plan.render_many(records)
+
+Each record is a dict with "filename", and optionally "sender", "date"
+(a date or datetime; today if missing), "attachment_type" and
+"attachment_filenames" (the other attachment names in the same email,
+used the way findAttachmentFilenames() is in the extension).
+
+Run "python filename_pattern.py --check" to compare against the golden
+outputs recorded from content.js.
+"""
+import datetime
+import json
+import os
+import re
+import sys
+
+DEFAULT_PATTERN = "DateFormat_SenderName_OriginalFilename"
+DEFAULT_DATE_FORMAT = "YYYY-MM-DD"
+
+# Replacement order matters: generateFilename replaces these one after another
+TOKENS = ("DateFormat", "SenderName", "OriginalFilename")
+
+# JavaScript's \s, which differs from Python's for a few code points
+_JS_SPACE = "[\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff]"
+_WHITESPACE_RUN = re.compile(_JS_SPACE + "+")
+_INVALID_CHARS = re.compile(r'[\\/:*?"<>|]')
+_INVALID_CHARS_WITH_AT = re.compile(r'[\\/:*?"<>|@]')
+_JS_TRIM = re.compile("^" + _JS_SPACE + "+|" + _JS_SPACE + "+$")
+_JS_SPACE_CHARS = frozenset(
+    "\t\n\v\f\r \u00a0\u1680\u2028\u2029\u202f\u205f\u3000\ufeff"
+    + "".join(chr(code) for code in range(0x2000, 0x200b))
+)
+_SENDER_EMAIL = re.compile(r"<([^>]+)>")
+_GENERIC_FILENAME = re.compile(r"^(attachment|document|file|untitled|image|img|chart|agreement|unknown)_?\d*$", re.IGNORECASE)
+_ALL_DIGITS = re.compile(r"^\d+$")
+_JS_REPLACEMENT = re.compile(r"\$([$&`'])")
+
+def _sanitize_text(text, keep_at):
+    invalid = _INVALID_CHARS if keep_at else _INVALID_CHARS_WITH_AT
+    # The trailing .trim() in the JS is a no-op: no whitespace survives this
+    return _WHITESPACE_RUN.sub("_", invalid.sub("_", text))
+
+def sanitize_filename(filename):
+    """
+    Same as sanitizeFilename() in content.js
+    """
+    if not filename:
+        return "unnamed"
+    return _sanitize_text(filename, "@" in filename)
+
+def sender_name(sender):
+    """
+    The SenderName value generateFilename() derives from a From header
+    """
+    if not sender:
+        return "unknown_sender"
+    match = _SENDER_EMAIL.search(sender)
+    if match and match.group(1):
+        name = _JS_TRIM.sub("", match.group(1))
+    elif "@" in sender:
+        name = _JS_TRIM.sub("", sender)
+    else:
+        name = sender
+    return sanitize_filename(name)
+
+def compile_date_format(date_format):
+    """
+    Return a function formatting a date like formatDate() in content.js
+    """
+    def format_date(date):
+        # Mirror the sequential String.replace calls, including their quirks
+        text = date_format.replace("YYYY", str(date.year))
+        text = text.replace("MM", f"{date.month:02d}")
+        text = re.sub(r"M(?!M)", str(date.month), text)
+        text = text.replace("DD", f"{date.day:02d}")
+        return re.sub(r"D(?!D)", str(date.day), text)
+
+    return format_date
+
+def _js_replace_all(text, token, value):
+    """
+    text.replace(/token/g, value), including JavaScript's $ substitutions
+    """
+    if "$" not in value:
+        return text.replace(token, value)
+
+    pieces = text.split(token)
+    out = [pieces[0]]
+    position = len(pieces[0])
+    for piece in pieces[1:]:
+        before, after = text[:position], text[position + len(token):]
+        special = {"$": "$", "&": token, "`": before, "'": after}
+        out.append(_JS_REPLACEMENT.sub(lambda m: special[m.group(1)], value))
+        out.append(piece)
+        position += len(token) + len(piece)
+    return "".join(out)
+
+class SequenceCounter:
+    """
+    Stand-in for the downloadCount kept in localStorage
+    """
+    def __init__(self, start=0):
+        self.value = start
+
+    def next(self):
+        self.value += 1
+        return self.value
+
+def original_filename(filename, attachment_type=None, attachment_filenames=(), counter=None):
+    """
+    The OriginalFilename value, replacing generic names the same way
+    generateFilename() does
+    """
+    is_generic = _GENERIC_FILENAME.match(filename) is not None
+    if not (is_generic or "." not in filename or "temp" in filename or _ALL_DIGITS.match(filename)):
+        return filename
+
+    clean = filename
+    for candidate in attachment_filenames:
+        if candidate != filename and not _GENERIC_FILENAME.match(candidate) and "." in candidate:
+            clean = candidate
+            break
+
+    if _GENERIC_FILENAME.match(clean) or "." not in clean:
+        if attachment_type:
+            extension = "." + attachment_type.lower()
+        elif "." in filename:
+            extension = filename[filename.rindex("."):]
+        else:
+            extension = ""
+        counter = counter or SequenceCounter()
+        clean = f"file{counter.next()}{extension}"
+    return clean
+
+# Bound on memoised sanitized values per plan
+_CLEAN_CACHE_MAX = 200000
+
+def _edge_risk(literal, token):
+    # A substituted value could combine with this literal into a later token
+    return any(literal.endswith(token[:i]) or literal.startswith(token[i:]) for i in range(1, len(token)))
+
+class RenderPlan:
+    """
+    A compiled filename pattern
+
+    parts is a list of literal strings and token indexes (0 for
+    DateFormat, 1 for SenderName, 2 for OriginalFilename). Rendering joins
+    the parts in one pass instead of three global replaces plus a second
+    sanitize of every intermediate string.
+    """
+    def __init__(self, pattern, date_format=DEFAULT_DATE_FORMAT):
+        self.pattern = pattern
+        self.date_format = date_format
+        self.format_date = compile_date_format(date_format)
+        self.parts = self._parse(pattern)
+        self.exact = self._plan_is_exact()
+        self.slots = tuple(part for part in self.parts if not isinstance(part, str))
+        self._literal_has_at = any(isinstance(part, str) and "@" in part for part in self.parts)
+        # Literals are sanitized up front, once per "@ present" mode
+        self._templates = {
+            keep_at: "".join(
+                _sanitize_text(part, keep_at).replace("%", "%%") if isinstance(part, str) else "%s"
+                for part in self.parts
+            )
+            for keep_at in (True, False)
+        }
+        self._clean_values = {}
+
+    @staticmethod
+    def _parse(pattern):
+        parts = [pattern]
+        for index, token in enumerate(TOKENS):
+            split = []
+            for part in parts:
+                if not isinstance(part, str):
+                    split.append(part)
+                    continue
+                pieces = part.split(token)
+                for position, piece in enumerate(pieces):
+                    if position:
+                        split.append(index)
+                    split.append(piece)
+            parts = split
+        return [part for part in parts if part != ""]
+
+    def _plan_is_exact(self):
+        """
+        True when joining parts is guaranteed to equal the sequential
+        replaces for any value that does not itself contain a token name
+        """
+        for position, part in enumerate(self.parts):
+            if isinstance(part, str):
+                continue
+            later = TOKENS[part + 1:]
+            for neighbour in (position - 1, position + 1):
+                if neighbour < 0 or neighbour >= len(self.parts):
+                    continue
+                neighbour = self.parts[neighbour]
+                if not isinstance(neighbour, str):
+                    return False
+                if any(_edge_risk(neighbour, token) for token in later):
+                    return False
+        return True
+
+    def _render_sequential(self, values):
+        text = self.pattern
+        for token, value in zip(TOKENS, values):
+            text = _js_replace_all(text, token, value)
+        return sanitize_filename(text)
+
+    def _render_joined(self, values):
+        return sanitize_filename("".join(
+            part if isinstance(part, str) else values[part] for part in self.parts
+        ))
+
+    def render_values(self, date_string, sender, original):
+        values = (date_string, sender, original)
+        if (not self.exact or "$" in date_string or "$" in sender or "$" in original
+                or "SenderName" in date_string or "OriginalFilename" in date_string
+                or "OriginalFilename" in sender):
+            # A value would be rewritten by a later replace; take the slow path
+            return self._render_sequential(values)
+
+        keep_at = self._literal_has_at or "@" in date_string or "@" in sender or "@" in original
+        clean_values = self._clean_values
+        cleaned = []
+        for index in self.slots:
+            value = values[index]
+            clean = clean_values.get((value, keep_at))
+            if clean is None:
+                if not value or value[0] in _JS_SPACE_CHARS or value[-1] in _JS_SPACE_CHARS:
+                    # Whitespace runs could merge across the boundary
+                    return self._render_joined(values)
+                if len(clean_values) >= _CLEAN_CACHE_MAX:
+                    clean_values.clear()
+                clean = clean_values[(value, keep_at)] = _sanitize_text(value, keep_at)
+            cleaned.append(clean)
+        return self._templates[keep_at] % tuple(cleaned)
+
+    def render(self, record, counter=None):
+        date = record.get("date") or datetime.date.today()
+        return self.render_values(
+            self.format_date(date),
+            sender_name(record.get("sender")),
+            original_filename(
+                record["filename"],
+                record.get("attachment_type"),
+                record.get("attachment_filenames") or (),
+                counter
+            )
+        )
+
+    def render_many(self, records, counter=None):
+        """
+        Render a batch of records, memoising the per-date and per-sender
+        work that repeats heavily across a mailbox
+        """
+        counter = counter or SequenceCounter()
+        today = datetime.date.today()
+        dates = {}
+        senders = {}
+        format_date = self.format_date
+        render_values = self.render_values
+        names = []
+        append = names.append
+
+        for record in records:
+            date = record.get("date") or today
+            # datetime values within one day share a date string
+            day = date.date() if isinstance(date, datetime.datetime) else date
+            date_string = dates.get(day)
+            if date_string is None:
+                date_string = dates[day] = format_date(day)
+
+            raw_sender = record.get("sender")
+            sender = senders.get(raw_sender)
+            if sender is None:
+                sender = senders[raw_sender] = sender_name(raw_sender)
+
+            filename = record["filename"]
+            attachment_type = record.get("attachment_type")
+            candidates = record.get("attachment_filenames")
+            if "." in filename and "temp" not in filename and not _GENERIC_FILENAME.match(filename) and not _ALL_DIGITS.match(filename):
+                original = filename
+            else:
+                original = original_filename(filename, attachment_type, candidates or (), counter)
+
+            append(render_values(date_string, sender, original))
+        return names
+
+_PLAN_CACHE = {}
+
+def compile_pattern(pattern=DEFAULT_PATTERN, date_format=DEFAULT_DATE_FORMAT):
+    """
+    Return a (cached) RenderPlan for pattern and date_format
+    """
+    key = (pattern or DEFAULT_PATTERN, date_format or DEFAULT_DATE_FORMAT)
+    plan = _PLAN_CACHE.get(key)
+    if plan is None:
+        plan = _PLAN_CACHE[key] = RenderPlan(*key)
+    return plan
+
+def generate_filename(original, sender=None, date=None, pattern=DEFAULT_PATTERN,
+                      date_format=DEFAULT_DATE_FORMAT, attachment_type=None,
+                      attachment_filenames=(), counter=None):
+    """
+    One-off equivalent of generateFilename() in content.js
+    """
+    return compile_pattern(pattern, date_format).render({
+        "filename": original,
+        "sender": sender,
+        "date": date,
+        "attachment_type": attachment_type,
+        "attachment_filenames": attachment_filenames
+    }, counter)
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "filename_pattern_golden.json")
+
+def check_golden(path=GOLDEN_PATH):
+    """
+    Compare against outputs recorded from content.js; returns mismatches
+    """
+    with open(path) as f:
+        cases = json.load(f)
+
+    mismatches = []
+    for case in cases:
+        counter = SequenceCounter(case.get("downloadCount", 0))
+        actual = generate_filename(
+            case["filename"],
+            sender=case.get("sender"),
+            date=datetime.date.fromisoformat(case["date"]),
+            pattern=case.get("pattern") or DEFAULT_PATTERN,
+            date_format=case.get("dateFormat") or DEFAULT_DATE_FORMAT,
+            attachment_type=case.get("attachmentType"),
+            attachment_filenames=case.get("attachmentFilenames", []),
+            counter=counter
+        )
+        if actual != case["expected"]:
+            mismatches.append((case, actual))
+    return mismatches
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        failures = check_golden()
+        for case, actual in failures:
+            print(f"MISMATCH {case['filename']!r}: expected {case['expected']!r}, got {actual!r}")
+        print(f"{len(failures)} mismatches")
+        sys.exit(1 if failures else 0)
+    print(__doc__)
@@ -0,0 +1,98 @@
+/**
+ * Record golden outputs of generateFilename() from content.js for
+ * filename_pattern.py. Run from the repository root:
+ *   TZ=UTC node fixtures/make_filename_golden.js > fixtures/filename_pattern_golden.json
+ */
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const source = fs.readFileSync(path.join(__dirname, '..', 'content.js'), 'utf8');
+
+// Pull a top-level function declaration out of content.js by brace matching
+function extractFunction(name) {
+  const start = source.indexOf(`function ${name}(`);
+  let depth = 0;
+  for (let i = source.indexOf('{', start); i < source.length; i++) {
+    if (source[i] === '{') depth++;
+    if (source[i] === '}' && --depth === 0) return source.slice(start, i + 1);
+  }
+  throw new Error(`Could not extract ${name}`);
+}
+
+const cases = [
+  { filename: 'Report_v2.pdf', sender: 'John Smith <john.smith@company.com>' },
+  { filename: 'Q1 Financials.xlsx', sender: 'sarah.j@example.com' },
+  { filename: 'User Manual v1.docx', sender: 'Dev Team' },
+  { filename: 'Campaign_Image.jpg', sender: '' },
+  { filename: 'notes:draft?.txt', sender: '"Marketing, Dept" <marketing@company.com>' },
+  { filename: 'contract@final.pdf', sender: 'Legal <legal@firm.org>' },
+  { filename: 'plan B　final.pdf', sender: 'Ops Team' },
+  { filename: 'a/b\\c|d.pdf', sender: 'x <  spaced@example.com  >' },
+  { filename: 'price $& list.pdf', sender: 'Shop <shop@example.com>' },
+  { filename: "it's $' and $` here.pdf", sender: 'Q <q@example.com>' },
+  { filename: 'cost $$5.csv', sender: 'Fin$ance <fin@example.com>' },
+  { filename: 'attachment', sender: 'A <a@example.com>', attachmentFilenames: ['attachment', 'Invoice 42.pdf'] },
+  { filename: 'document_3', sender: 'B <b@example.com>', attachmentType: 'PDF', downloadCount: 6 },
+  { filename: 'untitled', sender: 'C <c@example.com>' },
+  { filename: '12345', sender: 'D <d@example.com>' },
+  { filename: 'temp_upload.zip', sender: 'E <e@example.com>' },
+  { filename: 'README', sender: 'F <f@example.com>', attachmentFilenames: ['image_2', 'README'] },
+  { filename: 'IMG_0042.jpeg', sender: 'G <g@example.com>' },
+  { filename: 'image.png', sender: 'H <h@example.com>' },
+  { filename: 'summary.pdf', sender: 'I <i@example.com>', pattern: 'SenderName-DateFormat-OriginalFilename' },
+  { filename: 'summary.pdf', sender: 'I <i@example.com>', pattern: 'OriginalFilename' },
+  { filename: 'summary.pdf', sender: 'I <i@example.com>', pattern: 'DateFormat DateFormat OriginalFilename' },
+  { filename: 'summary.pdf', sender: 'J <j@example.com>', dateFormat: 'DD.MM.YYYY' },
+  { filename: 'summary.pdf', sender: 'J <j@example.com>', dateFormat: 'M-D-YYYY' },
+  { filename: 'summary.pdf', sender: 'J <j@example.com>', dateFormat: 'YYYYMMDD' },
+  { filename: 'summary.pdf', sender: 'OriginalFilename <k@example.com>', pattern: 'SenderName_OriginalFilename' },
+  { filename: 'summary.pdf', sender: 'Sender Name', pattern: 'OriginalSenderNameFilename' },
+  { filename: 'Filename.pdf', sender: 'L <l@example.com>', pattern: 'OriginalOriginalFilename' },
+  { filename: 'x.pdf', sender: 'M <m@example.com>', pattern: 'Report for SenderName: OriginalFilename' },
+];
+
+const results = [];
+for (const testCase of cases) {
+  const date = '2023-03-07';
+  const storage = new Map();
+  storage.set('filenamePattern', testCase.pattern || 'DateFormat_SenderName_OriginalFilename');
+  storage.set('dateFormat', testCase.dateFormat || 'YYYY-MM-DD');
+  storage.set('downloadCount', String(testCase.downloadCount || 0));
+
+  const FixedDate = class extends Date {
+    constructor(...args) {
+      super(...(args.length ? args : [`${date}T12:00:00Z`]));
+    }
+  };
+
+  const context = {
+    Date: FixedDate,
+    console: { log() {}, error() {} },
+    localStorage: {
+      getItem: (key) => (storage.has(key) ? storage.get(key) : null),
+      setItem: (key, value) => storage.set(key, String(value)),
+    },
+    currentEmailMetadata: {
+      sender: testCase.sender,
+      subject: 'Subject line',
+      attachmentType: testCase.attachmentType,
+    },
+    findAttachmentFilenames: () => testCase.attachmentFilenames || [],
+  };
+  vm.createContext(context);
+  vm.runInContext(
+    "let currentDateFormat = 'YYYY-MM-DD';\n" +
+    ['formatDate', 'sanitizeFilename', 'generateFilename'].map(extractFunction).join('\n'),
+    context
+  );
+  context.originalFilename = testCase.filename;
+
+  results.push({
+    ...testCase,
+    date,
+    expected: vm.runInContext('generateFilename(originalFilename)', context),
+  });
+}
+
+process.stdout.write(JSON.stringify(results, null, 2) + '\n');
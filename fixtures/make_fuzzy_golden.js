@@ -0,0 +1,73 @@
+/**
+ * Record golden outputs of calculateSimilarity() and
+ * tryFuzzyMatchAndRename() from background.js for fuzzy_match.py.
+ * Run from the repository root:
+ *   node fixtures/make_fuzzy_golden.js > fixtures/fuzzy_match_golden.json
+ */
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const source = fs.readFileSync(path.join(__dirname, '..', 'background.js'), 'utf8');
+
+// Pull a top-level function declaration out of background.js by brace matching
+function extractFunction(name) {
+  const start = source.indexOf(`function ${name}(`);
+  let depth = 0;
+  for (let i = source.indexOf('{', start); i < source.length; i++) {
+    if (source[i] === '{') depth++;
+    if (source[i] === '}' && --depth === 0) return source.slice(start, i + 1);
+  }
+  throw new Error(`Could not extract ${name}`);
+}
+
+const names = [
+  'Invoice 42.pdf', 'Invoice_42 (1).pdf', 'invoice-42.PDF', 'Invoice 43.pdf',
+  'Q1 Financials.xlsx', 'Q1_Financials.xlsx', 'Q2 Financials.xlsx', 'Q1 Financials.csv',
+  'attachment_1747249312345', 'attachment_1747249312345.pdf', 'attachment_1747249399999',
+  'scan_1747249312345.pdf', 'document.pdf', 'agreement', 'Service agreement.docx',
+  'IMG_0042.jpeg', 'IMG_0042 (2).jpeg', 'image.png', 'photo.PNG', 'README',
+  'résumé final.pdf', 'plan B　final.pdf', 'notes (draft).txt', 'notes_draft.txt',
+  '.pdf', '()', 'a', 'Contract - ACME Corp.docx', 'Contract_-_ACME_Corp.docx', ''
+];
+
+const scenarios = [
+  { pending: ['Invoice 42.pdf', 'Invoice 43.pdf', 'Q1 Financials.xlsx'], filenames: ['Invoice_42 (1).pdf', 'Invoice 44.pdf', 'Q1_Financials.xlsx', 'Q3 Report.xlsx'] },
+  { pending: ['attachment_1747249312345', 'Report.pdf'], filenames: ['attachment_1747249312345.pdf', 'attachment_999.pdf', 'document.pdf', 'x.pdf'] },
+  { pending: ['scan_1747249312345.pdf', 'agreement'], filenames: ['attachment_1747249312345', 'contract.pdf', 'notes.txt'] },
+  { pending: ['Budget.xlsx'], filenames: ['document', 'Budget (1).xlsx', 'other.txt'] },
+  { pending: ['a.pdf', 'b.pdf', 'c.pdf'], filenames: ['d.pdf', 'ab.pdf', 'document'] },
+  { pending: ['IMG_0042.jpeg', 'IMG_0043.jpeg', 'IMG_0042.jpeg '], filenames: ['IMG_0042 (2).jpeg', 'IMG_0044.jpeg', 'img.jpeg'] },
+  { pending: ['', 'README'], filenames: ['', 'READ ME', 'README.md'] },
+];
+
+const similarity = [];
+const matches = [];
+
+const context = {
+  console: { log() {}, error() {} },
+  licenseStatus: { isValid: true },
+  pendingDownloads: new Map(),
+  matched: null,
+  processDownloadRename(downloadItem, download) { context.matched = download.key; },
+};
+vm.createContext(context);
+vm.runInContext(extractFunction('calculateSimilarity') + '\n' + extractFunction('tryFuzzyMatchAndRename'), context);
+
+for (const a of names) {
+  for (const b of names) {
+    similarity.push({ a, b, expected: context.calculateSimilarity(a, b) });
+  }
+}
+
+for (const scenario of scenarios) {
+  const pending = scenario.pending.map((name, i) => [`download_${i}`, name]);
+  for (const filename of scenario.filenames) {
+    context.pendingDownloads = new Map(pending.map(([key, name]) => [key, { key, originalFilename: name }]));
+    context.matched = null;
+    vm.runInContext('tryFuzzyMatchAndRename({}, ' + JSON.stringify(filename) + ')', context);
+    matches.push({ pending, filename, expected: context.matched });
+  }
+}
+
+console.log(JSON.stringify({ similarity, matches }, null, 2));
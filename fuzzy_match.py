@@ -0,0 +1,432 @@
+"""
+Python reference for the fuzzy download matching in background.js
+(tryFuzzyMatchAndRename and calculateSimilarity), plus an indexed
+matcher that returns the same answers without comparing the finished
+download against every pending one.
+
+    matcher = FuzzyMatcher()
+    matcher.add("download_1", "Invoice 42.pdf")
+    matcher.best_match("Invoice_42 (1).pdf")   # -> "download_1"
+
+reference_match() is a line-for-line port of the extension's scan and
+is what FuzzyMatcher is validated against (see bench_fuzzy_match.py).
+Run "python fuzzy_match.py --check" to compare calculate_similarity()
+with the golden scores recorded from background.js.
+"""
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter
+
+# Thresholds used by tryFuzzyMatchAndRename
+THRESHOLD = 0.6
+PDF_VIEWER_THRESHOLD = 0.2
+# Its "relaxed matching" branch accepts any score above this for PDF viewer
+# files, so in practice it is the effective threshold for them
+RELAXED_THRESHOLD = 0.1
+
+SPECIAL_CASE_SCORE = 0.7
+CONTAINED_ID_SCORE = 0.8
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "fuzzy_match_golden.json")
+
+# JavaScript's \s and ASCII-only \w, as used by the normalize() regex
+_JS_SPACE_CHARS = (
+    "\t\n\v\f\r \u00a0\u1680\u2028\u2029\u202f\u205f\u3000\ufeff"
+    + "".join(chr(code) for code in range(0x2000, 0x200b))
+)
+_NOT_WORD_OR_SPACE = re.compile("[^A-Za-z0-9_" + re.escape(_JS_SPACE_CHARS) + "]")
+_ATTACHMENT_ID = re.compile(r"attachment_([0-9]+)")
+_EXTENSION = re.compile(r"\.([^.]+)\Z")
+_DIGIT_RUN = re.compile(r"[0-9]+")
+
+def is_possible_pdf_viewer_file(filename):
+    return ("pdf" in filename or filename.startswith("attachment_")
+            or "document" in filename or "agreement" in filename)
+
+def normalize(text):
+    return _NOT_WORD_OR_SPACE.sub("", text.lower())
+
+def attachment_id(text):
+    match = _ATTACHMENT_ID.search(text)
+    return match.group(1) if match else None
+
+def extension(text):
+    match = _EXTENSION.search(text)
+    return match.group(1).lower() if match else None
+
+def extension_bonus(ext1, ext2):
+    if ext1 is None or ext1 != ext2:
+        return 0.0
+    return 0.3 if ext1 == "pdf" else 0.2
+
+def _special_case(str1, str2):
+    return (("agreement" in str1 and "pdf" in str2)
+            or ("agreement" in str2 and "pdf" in str1)
+            or ("document.pdf" in str1 and "attachment_" in str2)
+            or ("document.pdf" in str2 and "attachment_" in str1))
+
+def _score(distance, max_len, bonus):
+    if max_len == 0:
+        return 1.0
+    return min(1 - distance / max_len + bonus, 1.0)
+
+def edit_distance(a, b, max_distance=None):
+    """
+    Levenshtein distance, or None as soon as it must exceed max_distance
+
+    Only a diagonal band of width 2 * max_distance + 1 is computed, in two
+    rows the length of the shorter string.
+    """
+    # A shared prefix or suffix never changes the distance
+    start = 0
+    end_a, end_b = len(a), len(b)
+    while start < end_a and start < end_b and a[start] == b[start]:
+        start += 1
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if len(a) < len(b):
+        a, b = b, a
+    n, m = len(a), len(b)
+    k = n if max_distance is None else max_distance
+    if n - m > k:
+        return None
+    if m == 0:
+        return n
+
+    over = k + 1
+    previous = list(range(m + 1))
+    current = [over] * (m + 1)
+    for i in range(1, n + 1):
+        lo = max(1, i - k)
+        hi = min(m, i + k)
+        current[0] = i if i <= k else over
+        if lo > 1:
+            current[lo - 1] = over
+        char = a[i - 1]
+        row_min = current[0]
+        left = current[lo - 1]
+        for j in range(lo, hi + 1):
+            value = previous[j - 1] if b[j - 1] == char else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if left + 1 < value:
+                value = left + 1
+            current[j] = left = value
+            if value < row_min:
+                row_min = value
+        if hi < m:
+            current[hi + 1] = over
+        if row_min > k:
+            return None
+        previous, current = current, previous
+
+    distance = previous[m]
+    return distance if distance <= k else None
+
+def calculate_similarity(str1, str2):
+    """
+    Same as calculateSimilarity() in background.js
+    """
+    if not str1 and not str2:
+        return 1.0
+    if not str1 or not str2:
+        return 0.0
+    if _special_case(str1, str2):
+        return SPECIAL_CASE_SCORE
+
+    norm1 = normalize(str1)
+    norm2 = normalize(str2)
+
+    id1 = attachment_id(str1)
+    id2 = attachment_id(str2)
+    if id1 and id2:
+        return 1.0 if id1 == id2 else 0.0
+    if id1 and id1 in str2:
+        return CONTAINED_ID_SCORE
+    if id2 and id2 in str1:
+        return CONTAINED_ID_SCORE
+
+    bonus = extension_bonus(extension(str1), extension(str2))
+    return _score(edit_distance(norm1, norm2), max(len(norm1), len(norm2)), bonus)
+
+def reference_match(pending, filename):
+    """
+    Key of the pending download tryFuzzyMatchAndRename() would pick for
+    filename, or None; pending maps keys to original filenames in
+    insertion order
+    """
+    pdf_viewer = is_possible_pdf_viewer_file(filename)
+    threshold = PDF_VIEWER_THRESHOLD if pdf_viewer else THRESHOLD
+    best_key = None
+    best_score = 0
+    for key, original in pending.items():
+        score = calculate_similarity(filename, original)
+        if score > best_score and score > threshold:
+            best_key, best_score = key, score
+        if pdf_viewer and score > RELAXED_THRESHOLD:
+            if best_key is None or score > best_score:
+                best_key, best_score = key, score
+
+    if best_key is None and pdf_viewer and len(pending) == 1:
+        return next(iter(pending))
+    return best_key
+
+# Query marker -> pending marker that together score SPECIAL_CASE_SCORE
+_SPECIAL_PAIRS = (
+    ("agreement", "pdf"),
+    ("pdf", "agreement"),
+    ("document.pdf", "attachment_"),
+    ("attachment_", "document.pdf"),
+)
+_SPECIAL_MARKERS = ("agreement", "pdf", "document.pdf", "attachment_")
+
+class _Entry:
+    __slots__ = ("key", "seq", "name", "norm", "ext", "attachment_id", "bigrams", "chars", "special")
+
+    def __init__(self, key, seq, name):
+        self.key = key
+        self.seq = seq
+        self.name = name
+        self.norm = normalize(name)
+        self.ext = extension(name)
+        self.attachment_id = attachment_id(name)
+        self.bigrams = Counter(self.norm[i:i + 2] for i in range(len(self.norm) - 1))
+        self.chars = Counter(self.norm)
+        # Substrings the special PDF cases in calculateSimilarity() look for
+        self.special = [marker for marker in _SPECIAL_MARKERS if marker in name]
+
+class FuzzyMatcher:
+    """
+    Pending downloads indexed so best_match() agrees with reference_match()
+    while running the edit distance on a shortlist only
+
+    Scores that calculateSimilarity() decides without an edit distance
+    (the PDF special cases and attachment IDs) come from set lookups. The
+    remaining entries are bucketed by extension and normalized length,
+    and an inverted index of bigrams gives each a lower bound on its edit
+    distance (q-gram lemma). Candidates are visited best bound first; a
+    character count comparison rejects most of the rest, and survivors get
+    a banded edit distance capped at the distance that could still beat
+    the current best.
+    """
+    def __init__(self):
+        self._entries = {}
+        self._next_seq = 0
+        self._empty = {}
+        self._buckets = {}
+        self._postings = {}
+        self._by_marker = {marker: {} for marker in _SPECIAL_MARKERS}
+        self._by_id = {}
+        # Digit substrings of entries without an attachment ID, for
+        # the "ID appears anywhere" rule
+        self._by_digits = {}
+        self.edit_distances = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def add(self, key, filename):
+        """
+        Register a pending download; re-adding a key keeps its position,
+        like Map.set()
+        """
+        existing = self._entries.get(key)
+        if existing is not None:
+            self._unindex(existing)
+            seq = existing.seq
+        else:
+            seq = self._next_seq
+            self._next_seq += 1
+        entry = _Entry(key, seq, filename)
+        self._entries[key] = entry
+        self._index(entry)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._unindex(entry)
+
+    def _digit_substrings(self, text):
+        for run in _DIGIT_RUN.findall(text):
+            for i in range(len(run)):
+                for j in range(i + 1, len(run) + 1):
+                    yield run[i:j]
+
+    def _index(self, entry):
+        if not entry.name:
+            self._empty[entry.key] = entry
+            return
+        self._buckets.setdefault((entry.ext, len(entry.norm)), {})[entry.key] = entry
+        for gram, count in entry.bigrams.items():
+            self._postings.setdefault(gram, {})[entry.key] = count
+        for marker in entry.special:
+            self._by_marker[marker][entry.key] = entry
+        if entry.attachment_id:
+            self._by_id.setdefault(entry.attachment_id, {})[entry.key] = entry
+        else:
+            for digits in set(self._digit_substrings(entry.name)):
+                self._by_digits.setdefault(digits, {})[entry.key] = entry
+
+    def _unindex(self, entry):
+        def discard(index, name):
+            bucket = index.get(name)
+            if bucket is not None:
+                bucket.pop(entry.key, None)
+                if not bucket:
+                    del index[name]
+
+        if not entry.name:
+            self._empty.pop(entry.key, None)
+            return
+        discard(self._buckets, (entry.ext, len(entry.norm)))
+        for gram in entry.bigrams:
+            discard(self._postings, gram)
+        for marker in entry.special:
+            self._by_marker[marker].pop(entry.key, None)
+        if entry.attachment_id:
+            discard(self._by_id, entry.attachment_id)
+        else:
+            for digits in set(self._digit_substrings(entry.name)):
+                discard(self._by_digits, digits)
+
+    def best_match(self, filename):
+        """
+        Same result as reference_match() over the pending downloads
+        """
+        pdf_viewer = is_possible_pdf_viewer_file(filename)
+        floor = min(PDF_VIEWER_THRESHOLD, RELAXED_THRESHOLD) if pdf_viewer else THRESHOLD
+        best = self._best(filename, floor)
+        if best is None and pdf_viewer and len(self._entries) == 1:
+            return next(iter(self._entries))
+        return best.key if best is not None else None
+
+    def _best(self, filename, floor):
+        best = None
+        best_score = floor
+
+        def better(score, seq):
+            if best is None:
+                return score > floor
+            return score > best_score or (score == best_score and seq < best.seq)
+
+        def offer(entries, score):
+            nonlocal best, best_score
+            for entry in entries:
+                if better(score, entry.seq):
+                    best, best_score = entry, score
+
+        if not filename:
+            offer(self._empty.values(), 1.0)
+            return best
+
+        special = {}
+        for query_marker, entry_marker in _SPECIAL_PAIRS:
+            if query_marker in filename:
+                special.update(self._by_marker[entry_marker])
+        offer(special.values(), SPECIAL_CASE_SCORE)
+
+        query_id = attachment_id(filename)
+        contained = {}
+        if query_id:
+            offer((e for key, e in self._by_id.get(query_id, {}).items() if key not in special), 1.0)
+            contained = self._by_digits.get(query_id, {})
+        else:
+            for digits in set(self._digit_substrings(filename)):
+                contained.update(self._by_id.get(digits, {}))
+        offer((e for key, e in contained.items() if key not in special), CONTAINED_ID_SCORE)
+
+        def needs_distance(entry):
+            if entry.key in special or entry.key in contained:
+                return False
+            # Entries with an attachment ID score 0.0 against another ID
+            return not (query_id and entry.attachment_id)
+
+        norm = normalize(filename)
+        chars = Counter(norm)
+        query_ext = extension(filename)
+        query_len = len(norm)
+        shared = Counter()
+        for gram, count in Counter(norm[i:i + 2] for i in range(query_len - 1)).items():
+            for key, entry_count in self._postings.get(gram, {}).items():
+                shared[key] += min(count, entry_count)
+
+        candidates = []
+        for (ext, length), bucket in self._buckets.items():
+            bonus = extension_bonus(query_ext, ext)
+            max_len = max(query_len, length)
+            length_gap = abs(query_len - length)
+            # Best possible score in this bucket; compared with the floor
+            # only, the current best keeps moving
+            if _score(length_gap, max_len, bonus) <= floor:
+                continue
+            for key, entry in bucket.items():
+                if not needs_distance(entry):
+                    continue
+                lower = max(length_gap, math.ceil((max_len - 1 - shared.get(key, 0)) / 2), 0)
+                bound = _score(lower, max_len, bonus)
+                if bound > floor:
+                    candidates.append((-bound, entry.seq, lower, max_len, bonus, entry))
+
+        candidates.sort(key=lambda candidate: candidate[:2])
+        for negative_bound, seq, lower, max_len, bonus, entry in candidates:
+            if not better(-negative_bound, seq):
+                break
+            limit = self._distance_limit(max_len, bonus, best_score, better, seq, lower)
+            # Every edit fixes at most one surplus and one missing character
+            if max(sum((chars - entry.chars).values()), sum((entry.chars - chars).values())) > limit:
+                continue
+            self.edit_distances += 1
+            distance = edit_distance(norm, entry.norm, limit)
+            if distance is not None:
+                offer((entry,), _score(distance, max_len, bonus))
+        return best
+
+    @staticmethod
+    def _distance_limit(max_len, bonus, target, better, seq, lower):
+        """
+        Largest edit distance whose score would still be accepted
+        """
+        if max_len == 0:
+            return 0
+        # One above the algebraic answer, then step down using the same
+        # floating point arithmetic the score uses
+        limit = min(max_len, max(lower, int((1 + bonus - target) * max_len) + 1))
+        while limit > lower and not better(_score(limit, max_len, bonus), seq):
+            limit -= 1
+        return limit
+
+def check_golden(path=GOLDEN_PATH):
+    """
+    Compare against scores recorded from background.js; returns mismatches
+    """
+    with open(path) as f:
+        golden = json.load(f)
+
+    mismatches = []
+    for case in golden["similarity"]:
+        actual = calculate_similarity(case["a"], case["b"])
+        if actual != case["expected"]:
+            mismatches.append((case, actual))
+    for case in golden["matches"]:
+        pending = dict(case["pending"])
+        actual = reference_match(pending, case["filename"])
+        if actual != case["expected"]:
+            mismatches.append((case, actual))
+    return mismatches
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        failures = check_golden()
+        for case, actual in failures:
+            print(f"MISMATCH {case}: got {actual!r}")
+        print(f"{len(failures)} mismatches")
+        sys.exit(1 if failures else 0)
+    print(__doc__)
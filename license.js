@@ -10,6 +10,9 @@ class LicenseManager {
     this.trialKey = 'trial_info';
     this.licenseKey = 'license_info';
     this.apiEndpoint = 'https://your-verification-api.com/verify'; // Replace with your API endpoint
+    // Public key the API signs offline tokens with (replace with yours); print it with
+    // python -c "import license_service; print(license_service.token_public_key())" in api/
+    this.tokenPublicKey = 'PVw1bOD38iud-cB9i9maGUvAAlpa7wXC5UVmIk8O2SA';
   }
 
   /**
@@ -89,7 +92,7 @@ class LicenseManager {
 
   /**
    * Get license information if available
-   * @returns {Promise<{licenseKey: string, validUntil: number, isPaid: boolean}|null>}
+   * @returns {Promise<{licenseKey: string, validUntil: number, isPaid: boolean, token: string|null}|null>}
    */
   async getLicenseInfo() {
     return new Promise((resolve) => {
@@ -99,6 +102,52 @@ class LicenseManager {
     });
   }
 
+  /**
+   * Check an offline token issued by the API for licenseKey
+   *
+   * Token format: v2.TYPE.VALIDUNTIL.EXPIRES.KEYSIG.SIGNATURE, where
+   * SIGNATURE is an Ed25519 signature of everything before it. Returns
+   * {validUntil, expiresAt, type} for a genuine, unexpired token, else null.
+   * @param {string} token - Token from a previous /verify response
+   * @param {string} licenseKey - The license key it should belong to
+   * @returns {Promise<{validUntil: number, expiresAt: number, type: string}|null>}
+   */
+  async checkOfflineToken(token, licenseKey) {
+    const parts = typeof token === 'string' ? token.split('.') : [];
+    if (parts.length !== 6 || parts[0] !== 'v2' || (parts[1] !== 'M' && parts[1] !== 'L')) {
+      return null;
+    }
+    if (parts[4] !== licenseKey.split('-').pop()) {
+      return null; // Issued for another key
+    }
+
+    const validUntil = Number(parts[2]);
+    const expiresAt = Number(parts[3]);
+    if (!Number.isSafeInteger(validUntil) || !Number.isSafeInteger(expiresAt) || expiresAt <= Date.now()) {
+      return null;
+    }
+
+    const fromBase64Url = (text) => {
+      const base64 = text.replace(/-/g, '+').replace(/_/g, '/') + '='.repeat((4 - text.length % 4) % 4);
+      return Uint8Array.from(atob(base64), (c) => c.charCodeAt(0));
+    };
+    try {
+      const publicKey = await crypto.subtle.importKey(
+        'raw', fromBase64Url(this.tokenPublicKey), { name: 'Ed25519' }, false, ['verify']
+      );
+      const signed = new TextEncoder().encode(parts.slice(0, 5).join('.'));
+      const genuine = await crypto.subtle.verify({ name: 'Ed25519' }, publicKey, fromBase64Url(parts[5]), signed);
+      if (!genuine) {
+        return null;
+      }
+    } catch (error) {
+      // Malformed signature, or a browser without Ed25519 in WebCrypto: check online instead
+      console.warn('Offline token check failed:', error);
+      return null;
+    }
+    return { validUntil, expiresAt, type: parts[1] === 'M' ? 'monthly' : 'lifetime' };
+  }
+
   /**
    * Activate a license key
    * @param {string} userLicenseKey - License key from user
@@ -106,6 +155,19 @@ class LicenseManager {
    */
   async activateLicense(userLicenseKey) {
     try {
+      // Skip the network while a previously issued offline token is genuine and unexpired
+      const existing = await this.getLicenseInfo();
+      if (existing && existing.licenseKey === userLicenseKey && existing.token) {
+        const claims = await this.checkOfflineToken(existing.token, userLicenseKey);
+        if (claims) {
+          return {
+            success: true,
+            message: 'License activated successfully!',
+            validUntil: claims.validUntil
+          };
+        }
+      }
+
       // Validate license key with your backend
       const response = await fetch(this.apiEndpoint, {
         method: 'POST',
@@ -125,7 +187,8 @@ class LicenseManager {
           licenseKey: userLicenseKey,
           validUntil: data.validUntil || Date.now() + (365 * 24 * 60 * 60 * 1000), // Default to 1 year
           isPaid: true,
-          type: data.type || 'monthly' // 'monthly' or 'lifetime'
+          type: data.type || 'monthly', // 'monthly' or 'lifetime'
+          token: data.token || null // Signed offline token; its expiry is read from the token itself
         };
         
         await new Promise((resolve) => {
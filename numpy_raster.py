@@ -0,0 +1,186 @@
+"""
+Optional NumPy rasterizer for the flat shapes in create_icon.py and
+create_screenshots.py.
+
+Canvas mirrors the part of ImageDraw those scripts use (rectangle,
+polygon and a one-call rounded_rectangle) but draws anti-aliased
+coverage masks and composites them with NumPy. A canvas holds a batch
+of images that share geometry: each shape's mask is computed once and
+blended into every image of the batch in a single array operation, with
+a different colour per image if fill is given as an (n, 3|4) array.
+
+    canvas = Canvas((128, 128), batch=len(palettes))
+    canvas.rounded_rectangle((14, 14, 114, 114), 16, fill=backgrounds)
+    images = canvas.to_images()
+
+Coordinates follow ImageDraw by default: integer coordinates name pixels
+and box corners are inclusive. With inclusive=False they are continuous
+(box edges exactly at x0 and x1, polygon vertices exactly at their
+points), which is what ImageDraw converges to when drawn supersampled
+and downsampled. Shapes are composited source-over.
+"""
+import functools
+
+try:
+    import numpy as np
+except ImportError:  # optional; callers keep using ImageDraw
+    np = None
+
+from PIL import Image
+
+# Subsamples per pixel side for polygon coverage
+POLYGON_SUBSAMPLES = 4
+
+def available():
+    return np is not None
+
+def _bounds(x0, y0, x1, y1, width, height):
+    """
+    Pixel slices covering a continuous box, clipped to the canvas
+    """
+    left = max(0, int(np.floor(x0)))
+    top = max(0, int(np.floor(y0)))
+    right = min(width, int(np.ceil(x1)))
+    bottom = min(height, int(np.ceil(y1)))
+    return slice(top, max(top, bottom)), slice(left, max(left, right))
+
+@functools.lru_cache(maxsize=4096)
+def rectangle_mask(xy, size, inclusive=True):
+    """
+    (rows, cols, coverage) of an axis-aligned box, exact at the edges
+    """
+    x0, y0, x1, y1 = xy
+    if inclusive:
+        x1 += 1
+        y1 += 1
+    rows, cols = _bounds(x0, y0, x1, y1, *size)
+    xs = np.arange(cols.start, cols.stop, dtype=np.float32)
+    ys = np.arange(rows.start, rows.stop, dtype=np.float32)
+    cover_x = np.clip(np.minimum(xs + 1, x1) - np.maximum(xs, x0), 0, 1)
+    cover_y = np.clip(np.minimum(ys + 1, y1) - np.maximum(ys, y0), 0, 1)
+    return rows, cols, cover_y[:, None] * cover_x[None, :]
+
+@functools.lru_cache(maxsize=4096)
+def rounded_rectangle_mask(xy, radius, size, width=None, inclusive=True):
+    """
+    (rows, cols, coverage) of a rounded box from its signed distance;
+    with width, only a border that many pixels thick
+    """
+    x0, y0, x1, y1 = xy
+    if inclusive:
+        x1 += 1
+        y1 += 1
+    rows, cols = _bounds(x0, y0, x1, y1, *size)
+    xs = np.arange(cols.start, cols.stop, dtype=np.float32) + 0.5
+    ys = np.arange(rows.start, rows.stop, dtype=np.float32) + 0.5
+    half_w = (x1 - x0) / 2
+    half_h = (y1 - y0) / 2
+    radius = min(radius, half_w, half_h)
+    qx = np.abs(xs - (x0 + half_w))[None, :] - (half_w - radius)
+    qy = np.abs(ys - (y0 + half_h))[:, None] - (half_h - radius)
+    distance = (np.hypot(np.maximum(qx, 0), np.maximum(qy, 0))
+                + np.minimum(np.maximum(qx, qy), 0) - radius)
+    coverage = np.clip(0.5 - distance, 0, 1)
+    if width is not None:
+        coverage -= np.clip(0.5 - (distance + width), 0, 1)
+    return rows, cols, coverage
+
+@functools.lru_cache(maxsize=4096)
+def polygon_mask(points, size, subsamples=POLYGON_SUBSAMPLES, inclusive=True):
+    """
+    (rows, cols, coverage) of a polygon, by even-odd testing a grid of
+    subsamples in each pixel
+    """
+    # ImageDraw puts vertex (x, y) at the centre of pixel (x, y)
+    shift = 0.5 if inclusive else 0.0
+    xs = [x + shift for x, _ in points]
+    ys = [y + shift for _, y in points]
+    rows, cols = _bounds(min(xs), min(ys), max(xs), max(ys), *size)
+    offsets = (np.arange(subsamples, dtype=np.float32) + 0.5) / subsamples
+    px = (np.arange(cols.start, cols.stop, dtype=np.float32)[:, None] + offsets).ravel()[None, :]
+    py = (np.arange(rows.start, rows.stop, dtype=np.float32)[:, None] + offsets).ravel()[:, None]
+
+    inside = np.zeros((py.shape[0], px.shape[1]), dtype=bool)
+    for i in range(len(points)):
+        xi, yi = xs[i], ys[i]
+        xj, yj = xs[i - 1], ys[i - 1]
+        if yi == yj:
+            continue
+        crosses = (yi > py) != (yj > py)
+        x_cross = xi + (py - yi) * ((xj - xi) / (yj - yi))
+        inside ^= crosses & (px < x_cross)
+
+    height = rows.stop - rows.start
+    width = cols.stop - cols.start
+    coverage = inside.reshape(height, subsamples, width, subsamples).mean(axis=(1, 3), dtype=np.float32)
+    return rows, cols, coverage
+
+class Canvas:
+    """
+    A batch of RGBA images drawn with the same shapes
+    """
+    def __init__(self, size, batch=1, background=(0, 0, 0, 0), inclusive=True):
+        if np is None:
+            raise RuntimeError("the NumPy backend needs numpy installed")
+        self.size = size
+        self.batch = batch
+        self.inclusive = inclusive
+        width, height = size
+        # Premultiplied RGBA in 0..1
+        self.pixels = np.zeros((batch, height, width, 4), dtype=np.float32)
+        self.pixels[:] = self._colors(background)[:, None, None, :]
+
+    def _colors(self, fill):
+        """
+        fill as a (batch, 4) array of premultiplied colours
+        """
+        colors = np.asarray(fill, dtype=np.float32) / 255
+        if colors.ndim == 1:
+            colors = np.broadcast_to(colors, (self.batch, colors.shape[0]))
+        if colors.shape[1] == 3:
+            colors = np.concatenate([colors, np.ones((self.batch, 1), dtype=np.float32)], axis=1)
+        colors = colors.copy()
+        colors[:, :3] *= colors[:, 3:]
+        return colors
+
+    def _composite(self, mask, fill):
+        rows, cols, coverage = mask
+        if fill is None or coverage.size == 0:
+            return
+        colors = self._colors(fill)
+        region = self.pixels[:, rows, cols, :]
+        coverage = coverage[None, :, :, None]
+        # Source over: dst = src * coverage + dst * (1 - src_alpha * coverage)
+        region *= 1 - coverage * colors[:, None, None, 3:]
+        region += coverage * colors[:, None, None, :]
+
+    def rectangle(self, xy, fill=None, outline=None):
+        xy = tuple(float(value) for value in np.ravel(xy))
+        self._composite(rectangle_mask(xy, self.size, self.inclusive), fill)
+        if outline is not None:
+            self._composite(rounded_rectangle_mask(xy, 0.0, self.size, 1.0, self.inclusive), outline)
+
+    def rounded_rectangle(self, xy, radius, fill=None, outline=None):
+        xy = tuple(float(value) for value in np.ravel(xy))
+        self._composite(rounded_rectangle_mask(xy, float(radius), self.size, None, self.inclusive), fill)
+        if outline is not None:
+            self._composite(rounded_rectangle_mask(xy, float(radius), self.size, 1.0, self.inclusive), outline)
+
+    def polygon(self, points, fill=None):
+        points = tuple((float(x), float(y)) for x, y in points)
+        self._composite(polygon_mask(points, self.size, POLYGON_SUBSAMPLES, self.inclusive), fill)
+
+    def to_array(self):
+        """
+        The batch as a (batch, height, width, 4) uint8 array, straight alpha
+        """
+        pixels = self.pixels * 255
+        alpha = self.pixels[..., 3:]
+        with np.errstate(divide='ignore'):
+            inverse = np.where(alpha > 0, 1 / alpha, 0).astype(np.float32)
+        pixels[..., :3] *= inverse
+        np.rint(pixels, out=pixels)
+        return pixels.astype(np.uint8)
+
+    def to_images(self):
+        return [Image.fromarray(pixels, 'RGBA') for pixels in self.to_array()]
@@ -0,0 +1,361 @@
+"""
+Offline replay of the extension's download matching.
+
+background.js keeps a pendingDownloads map: content.js registers each
+attachment it is about to download (watchForDownloads), and when Chrome
+reports a new download (downloads.onCreated) it is matched against the
+map by attachment ID, download ID and filename, then by
+tryFuzzyMatchAndRename. Entries expire after 5 minutes, checked whenever
+a new one is registered. This script replays a trace of those events
+through the same pipeline, or through alternative matching and expiry
+policies, and reports match latency, wrong and missed matches and the
+size of the pending map over time.
+
+A trace is a JSON lines file of events in time order (t in ms):
+
+    {"t": 0, "event": "watch", "key": "download_1_ab", "originalFilename": "Invoice.pdf", "newFilename": "2023-03-07_x_Invoice.pdf"}
+    {"t": 180, "event": "download", "filename": "Invoice.pdf", "url": "https://mail-attachment.googleusercontent.com/...", "expected": "download_1_ab"}
+
+"expected" is the key the download really belongs to (null for
+downloads the extension never asked for) and is only used for scoring.
+Matching a different entry with the same newFilename (say, two copies of
+image.png from one email) counts as correct, since the file ends up
+with the right name either way.
+
+Usage:
+    python replay_downloads.py trace.jsonl
+    python replay_downloads.py --synthetic --threads 40 --attachments 40 --matcher extension indexed fifo --ttl 300 60
+"""
+import argparse
+import json
+import random
+import re
+import time
+from collections import deque
+
+from bench_fuzzy_match import mutate, pending_name
+from fuzzy_match import FuzzyMatcher, reference_match
+
+EXPIRATION_MS = 5 * 60 * 1000
+GMAIL_URL = "https://mail-attachment.googleusercontent.com/attachment/u/0/?view=att&attid=0.1"
+OTHER_URL = "https://example.com/files/download"
+
+_ATTACHMENT_ID = re.compile(r"attachment_(\d+)")
+# Chrome's " (1)" suffix for a name that already exists in the folder
+_CHROME_COPY = re.compile(r" \(\d+\)(?=\.[^.]*$|$)")
+
+class PendingDownload:
+    __slots__ = ("key", "original_filename", "new_filename", "download_id", "timestamp")
+
+    def __init__(self, key, original_filename, new_filename, download_id, timestamp):
+        self.key = key
+        self.original_filename = original_filename
+        self.new_filename = new_filename
+        self.download_id = download_id
+        self.timestamp = timestamp
+
+def is_tracked_download(filename, url):
+    """
+    The isGmailDownload || isPdfViewerDownload test in downloads.onCreated
+    """
+    is_gmail = ("mail-attachment.googleusercontent.com" in url
+                or ("mail.google.com" in url and ("/download/" in url or "attid=" in url)))
+    is_pdf_viewer = ("docs.google.com/viewer" in url or "drive.google.com" in url
+                     or filename.lower().endswith(".pdf"))
+    return is_gmail or is_pdf_viewer
+
+def _related(filename, original):
+    return filename == original or original in filename or filename in original
+
+class ExtensionMatcher:
+    """
+    downloads.onCreated as written in background.js: three scans in which
+    the last matching entry wins, then the tryFuzzyMatchAndRename scan
+    """
+    name = "extension"
+
+    def __init__(self):
+        self.pending = {}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, entry):
+        # Map.set() keeps the position of an existing key
+        self.pending[entry.key] = entry
+
+    def remove(self, key):
+        del self.pending[key]
+
+    def match(self, filename):
+        return self.exact_match(filename) or self.fuzzy_match(filename)
+
+    def exact_match(self, filename):
+        matched = None
+        if "attachment_" in filename:
+            found = _ATTACHMENT_ID.search(filename)
+            if found:
+                for key, entry in self.pending.items():
+                    if found.group(1) in entry.original_filename:
+                        matched = key
+        if matched is None:
+            for key, entry in self.pending.items():
+                if entry.download_id and "download_" in key and _related(filename, entry.original_filename):
+                    matched = key
+        if matched is None:
+            for key, entry in self.pending.items():
+                if _related(filename, entry.original_filename):
+                    matched = key
+        return matched
+
+    def fuzzy_match(self, filename):
+        return reference_match({key: entry.original_filename for key, entry in self.pending.items()}, filename)
+
+class IndexedMatcher(ExtensionMatcher):
+    """
+    Same decisions as ExtensionMatcher, with the fuzzy step answered by
+    FuzzyMatcher instead of a scan
+    """
+    name = "indexed"
+
+    def __init__(self):
+        super().__init__()
+        self.fuzzy = FuzzyMatcher()
+
+    def add(self, entry):
+        super().add(entry)
+        self.fuzzy.add(entry.key, entry.original_filename)
+
+    def remove(self, key):
+        super().remove(key)
+        self.fuzzy.remove(key)
+
+    def fuzzy_match(self, filename):
+        return self.fuzzy.best_match(filename)
+
+class FifoMatcher(IndexedMatcher):
+    """
+    Exact filename lookup (ignoring Chrome's " (n)" copy suffix) that
+    hands out the oldest pending entry first, then the indexed fuzzy
+    match; same-named attachments from one "download all" are matched in
+    the order they were requested
+    """
+    name = "fifo"
+
+    def __init__(self):
+        super().__init__()
+        self.by_name = {}
+
+    def add(self, entry):
+        if entry.key in self.pending:
+            self._forget_name(self.pending[entry.key])
+        super().add(entry)
+        self.by_name.setdefault(entry.original_filename, deque()).append(entry.key)
+
+    def remove(self, key):
+        self._forget_name(self.pending[key])
+        super().remove(key)
+
+    def _forget_name(self, entry):
+        keys = self.by_name[entry.original_filename]
+        keys.remove(entry.key)
+        if not keys:
+            del self.by_name[entry.original_filename]
+
+    def match(self, filename):
+        for name in (filename, _CHROME_COPY.sub("", filename)):
+            keys = self.by_name.get(name)
+            if keys:
+                return keys[0]
+        return self.fuzzy_match(filename)
+
+MATCHERS = {matcher.name: matcher for matcher in (ExtensionMatcher, IndexedMatcher, FifoMatcher)}
+
+class ExpiryPolicy:
+    """
+    Drop entries older than ttl_ms whenever a download is registered
+    ("watch", what the extension does), when one arrives ("download"),
+    or on both; ttl_ms None never expires anything
+    """
+    def __init__(self, ttl_ms=EXPIRATION_MS, on="watch"):
+        self.ttl_ms = ttl_ms
+        self.on = on
+
+    @property
+    def name(self):
+        ttl = "none" if self.ttl_ms is None else f"{self.ttl_ms // 1000}s"
+        return f"ttl={ttl}/{self.on}"
+
+    def expire(self, matcher, now, event):
+        if self.ttl_ms is None or self.on not in (event, "both"):
+            return 0
+        expired = [key for key, entry in matcher.pending.items() if now - entry.timestamp > self.ttl_ms]
+        for key in expired:
+            matcher.remove(key)
+        return len(expired)
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def replay(events, matcher, expiry, sample_ms=1000):
+    """
+    Run a trace through one matcher and expiry policy; returns a stats dict
+    """
+    latencies = []
+    new_filenames = {}
+    outcomes = {"correct": 0, "wrong": 0, "missed": 0, "false_positive": 0, "ignored": 0}
+    expired = 0
+    sizes = []
+    max_size = 0
+    size_sum = 0
+
+    for event in events:
+        now = event["t"]
+        if event["event"] == "watch":
+            new_filenames[event["key"]] = event.get("newFilename")
+            matcher.add(PendingDownload(
+                event["key"], event["originalFilename"], event.get("newFilename"),
+                event.get("downloadId", event["key"]), now
+            ))
+            expired += expiry.expire(matcher, now, "watch")
+        else:
+            expired += expiry.expire(matcher, now, "download")
+            filename = re.split(r"[/\\]", event["filename"])[-1]
+            if not is_tracked_download(filename, event.get("url", GMAIL_URL)):
+                outcomes["ignored"] += 1
+                continue
+            started = time.perf_counter_ns()
+            key = matcher.match(filename)
+            if key is not None:
+                matcher.remove(key)
+            latencies.append((time.perf_counter_ns() - started) / 1e6)
+
+            expected = event.get("expected")
+            if key is None:
+                outcomes["missed" if expected is not None else "correct"] += 1
+            elif expected is None:
+                outcomes["false_positive"] += 1
+            else:
+                same_name = new_filenames.get(key) == new_filenames.get(expected)
+                outcomes["correct" if key == expected or same_name else "wrong"] += 1
+
+        size = len(matcher)
+        max_size = max(max_size, size)
+        size_sum += size
+        if not sizes or now - sizes[-1][0] >= sample_ms:
+            sizes.append((now, size))
+
+    latencies.sort()
+    scored = sum(outcomes.values()) - outcomes["ignored"]
+    return {
+        "matcher": matcher.name,
+        "expiry": expiry.name,
+        "downloads": scored,
+        **outcomes,
+        "wrong_rate": round((outcomes["wrong"] + outcomes["false_positive"]) / scored, 4) if scored else 0.0,
+        "miss_rate": round(outcomes["missed"] / scored, 4) if scored else 0.0,
+        "expired": expired,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.5), 4),
+            "p99": round(percentile(latencies, 0.99), 4),
+            "max": round(latencies[-1], 4) if latencies else 0.0
+        },
+        "pending_max": max_size,
+        "pending_mean": round(size_sum / len(events), 1) if events else 0.0,
+        "pending_over_time": sizes
+    }
+
+def synthetic_trace(threads=40, attachments=40, seed=0, cancel_rate=0.05, foreign_rate=0.05):
+    """
+    "Download all" bursts: each thread registers its attachments within a
+    second, Chrome reports them a little later and slightly out of order
+    (renaming repeated names to "name (1).ext"), some downloads are
+    cancelled and never arrive, and some unrelated downloads are mixed in
+    """
+    rng = random.Random(seed)
+    events = []
+    now = 0
+    serial = 0
+    for _ in range(threads):
+        names = [pending_name(rng) for _ in range(max(1, attachments // 3))]
+        seen = {}
+        for _ in range(rng.randint(max(1, attachments // 2), attachments)):
+            name = rng.choice(names) if rng.random() < 0.3 else pending_name(rng)
+            serial += 1
+            key = f"download_{now}_{serial:09d}"
+            watched_at = now + rng.randint(0, 1000)
+            events.append({"t": watched_at, "event": "watch", "key": key,
+                           "originalFilename": name, "newFilename": f"renamed_{name}"})
+            if rng.random() < cancel_rate:
+                continue
+            copies = seen.get(name, 0)
+            seen[name] = copies + 1
+            filename = name
+            if copies:
+                stem, dot, ext = name.rpartition(".")
+                filename = f"{stem} ({copies}).{ext}" if dot else f"{name} ({copies})"
+            elif rng.random() < 0.1:
+                filename = mutate(rng, name)
+            events.append({"t": watched_at + rng.randint(50, 3000), "event": "download",
+                           "filename": filename, "url": GMAIL_URL, "expected": key})
+        for _ in range(rng.randint(0, 2)):
+            if rng.random() < foreign_rate * attachments:
+                events.append({"t": now + rng.randint(0, 5000), "event": "download",
+                               "filename": pending_name(rng), "url": rng.choice([GMAIL_URL, OTHER_URL]),
+                               "expected": None})
+        now += rng.randint(5000, 120000)
+    events.sort(key=lambda event: event["t"])
+    return events
+
+def load_trace(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def parse_ttl(value):
+    return None if value == "none" else int(float(value) * 1000)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay download-matching traces through matching and expiry policies")
+    parser.add_argument("trace", nargs="?", help="JSON lines trace (see module docstring)")
+    parser.add_argument("--synthetic", action="store_true", help="generate a burst trace instead of reading one")
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--attachments", type=int, default=40, help="attachments per download-all burst")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-trace", help="write the replayed trace to this file")
+    parser.add_argument("--matcher", nargs="+", choices=sorted(MATCHERS), default=["extension"])
+    parser.add_argument("--ttl", nargs="+", type=parse_ttl, default=[EXPIRATION_MS],
+                        help="expiry in seconds, or none (default 300)")
+    parser.add_argument("--expire-on", nargs="+", choices=["watch", "download", "both"], default=["watch"])
+    parser.add_argument("--json", help="write results, including pending size over time, to this file")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        events = synthetic_trace(args.threads, args.attachments, args.seed)
+    elif args.trace:
+        events = load_trace(args.trace)
+    else:
+        parser.error("give a trace file or --synthetic")
+    if args.save_trace:
+        with open(args.save_trace, "w") as f:
+            f.writelines(json.dumps(event) + "\n" for event in events)
+
+    results = []
+    for name in args.matcher:
+        for ttl in args.ttl:
+            for on in args.expire_on:
+                stats = replay(events, MATCHERS[name](), ExpiryPolicy(ttl, on))
+                results.append(stats)
+                print(f"{stats['matcher']:>9} {stats['expiry']:<18} {stats['downloads']} downloads  "
+                      f"wrong {stats['wrong_rate']:.2%}  missed {stats['miss_rate']:.2%}  "
+                      f"latency p50 {stats['latency_ms']['p50']:.3f}ms p99 {stats['latency_ms']['p99']:.3f}ms  "
+                      f"pending max {stats['pending_max']} mean {stats['pending_mean']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
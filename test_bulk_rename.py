@@ -0,0 +1,134 @@
+"""
+Tests for bulk_rename.py extraction.
+
+    python -m pytest -q test_bulk_rename.py
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from attachment_index import AttachmentIndex
+from bulk_rename import INDEX_NAME, MAX_NAME_BYTES, extract
+
+def attachment_message(disposition, body="aGVsbG8="):
+    return (
+        "From sender@example.com Mon Jan  1 00:00:00 2024\n"
+        "From: Sender <sender@example.com>\n"
+        "Date: Mon, 1 Jan 2024 00:00:00 +0000\n"
+        "Subject: test\n"
+        "MIME-Version: 1.0\n"
+        'Content-Type: multipart/mixed; boundary="b"\n'
+        "\n"
+        "--b\n"
+        "Content-Type: text/plain\n"
+        "\n"
+        "hi\n"
+        "--b\n"
+        "Content-Type: application/pdf\n"
+        "Content-Transfer-Encoding: base64\n"
+        f"Content-Disposition: attachment; {disposition}\n"
+        "\n"
+        f"{body}\n"
+        "--b--\n"
+        "\n"
+    )
+
+def write_mbox(tmp_path, *messages):
+    path = tmp_path / "mail.mbox"
+    path.write_text("".join(messages), encoding="utf-8")
+    return str(path)
+
+def extracted(output_dir):
+    return sorted(name for name in os.listdir(output_dir) if not name.startswith("."))
+
+@pytest.mark.parametrize("disposition", [
+    "filename*=utf-8''a%00b.pdf",
+    "filename*=utf-8''a%0Ab%0D%1F.pdf",
+    "filename*=utf-8''%00%01%02"
+])
+def test_hostile_filename_is_written(tmp_path, disposition):
+    source = write_mbox(tmp_path, attachment_message(disposition), attachment_message('filename="next.pdf"'))
+    output_dir = str(tmp_path / "out")
+    stats = extract(source, output_dir, pattern="OriginalFilename", log=None)
+
+    names = extracted(output_dir)
+    assert stats["failed_attachments"] == 0
+    assert stats["attachments"] == 2
+    assert len(names) == 2
+    assert not any(ord(c) < 0x20 for name in names for c in name)
+    for name in names:
+        with open(os.path.join(output_dir, name), "rb") as f:
+            assert f.read() == b"hello"
+
+def test_long_filename_is_shortened(tmp_path):
+    source = write_mbox(tmp_path, attachment_message(f'filename="{"x" * 400}.pdf"'))
+    output_dir = str(tmp_path / "out")
+    stats = extract(source, output_dir, pattern="OriginalFilename", log=None)
+
+    names = extracted(output_dir)
+    assert stats["failed_attachments"] == 0
+    assert len(names) == 1
+    assert names[0].endswith(".pdf")
+    assert len(names[0].encode("utf-8")) <= MAX_NAME_BYTES
+
+@pytest.mark.parametrize("dedup", ["skip", "link"])
+def test_dedup_replaces_deleted_copy(tmp_path, dedup):
+    # The duplicate makes the index cache the first copy's SHA-256
+    source = write_mbox(tmp_path, attachment_message('filename="first.pdf"'),
+                        attachment_message('filename="again.pdf"'))
+    output_dir = str(tmp_path / "out")
+    extract(source, output_dir, pattern="OriginalFilename", log=None, dedup=dedup)
+    os.remove(os.path.join(output_dir, "first.pdf"))
+
+    # Same content in a new message: the indexed copy is gone, so it must be written again
+    with open(source, "a", encoding="utf-8") as f:
+        f.write(attachment_message('filename="third.pdf"'))
+    stats = extract(source, output_dir, pattern="OriginalFilename", log=None, dedup=dedup)
+
+    assert stats["duplicates"] == 0
+    assert "third.pdf" in extracted(output_dir)
+    index = AttachmentIndex(os.path.join(output_dir, INDEX_NAME))
+    try:
+        assert index.find_duplicate(os.path.join(output_dir, "third.pdf"), 5)[0] == \
+            os.path.join(os.path.abspath(output_dir), "third.pdf")
+        assert len(index) == 1
+    finally:
+        index.close()
+
+CRASH_AFTER_FIRST_RECORD = """
+import os, sys
+import extraction_journal
+from bulk_rename import extract
+
+record = extraction_journal.ExtractionJournal.record
+def record_then_crash(self, *args):
+    record(self, *args)
+    os._exit(3)
+extraction_journal.ExtractionJournal.record = record_then_crash
+extract(sys.argv[1], sys.argv[2], pattern="OriginalFilename", log=None, dedup="skip")
+"""
+
+def test_index_is_committed_before_journal_record(tmp_path):
+    source = write_mbox(tmp_path, attachment_message('filename="first.pdf"'),
+                        attachment_message('filename="second.pdf"', body="d29ybGQ="))
+    output_dir = str(tmp_path / "out")
+    result = subprocess.run([sys.executable, "-c", CRASH_AFTER_FIRST_RECORD, source, output_dir],
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 3
+
+    index = AttachmentIndex(os.path.join(output_dir, INDEX_NAME))
+    try:
+        assert len(index) == 1
+    finally:
+        index.close()
+
+    # The resumed run skips the journalled message and dedups against its file
+    source = write_mbox(tmp_path, attachment_message('filename="first.pdf"'),
+                             attachment_message('filename="second.pdf"', body="d29ybGQ="),
+                             attachment_message('filename="third.pdf"'))
+    stats = extract(source, output_dir, pattern="OriginalFilename", log=None, dedup="skip")
+    assert stats["skipped_messages"] == 1
+    assert stats["duplicates"] == 1
+    assert extracted(output_dir) == ["first.pdf", "second.pdf"]
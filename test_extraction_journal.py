@@ -0,0 +1,65 @@
+"""
+Tests for the extraction_journal.py checkpoint journal.
+
+    python -m pytest -q test_extraction_journal.py
+"""
+import os
+import tracemalloc
+
+from extraction_journal import ExtractionJournal
+
+def test_recorded_spans_are_done_after_reload(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = ExtractionJournal(path)
+    journal.record("mail.mbox", 10, 90, ["a.pdf"], 1)
+    journal.record("mail.mbox", 150, 50, [], 1)
+    journal.close()
+
+    journal = ExtractionJournal(path)
+    try:
+        assert len(journal) == 2
+        assert journal.counter == 1
+        assert journal.is_done("mail.mbox", 10, 90)
+        assert journal.is_done(os.path.abspath("mail.mbox"), 150, 50)
+        assert not journal.is_done("mail.mbox", 250, 40)
+        assert not journal.is_done("other.mbox", 10, 90)
+        assert journal.high_water("mail.mbox") == 200
+    finally:
+        journal.close()
+
+def test_failed_span_is_retried_until_recorded(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = ExtractionJournal(path)
+    journal.record("mail.mbox", 10, 90, [], 0)
+    journal.record_failure("mail.mbox", 150, 50)
+    journal.record("mail.mbox", 250, 40, [], 0)
+    journal.close()
+
+    journal = ExtractionJournal(path)
+    assert not journal.is_done("mail.mbox", 150, 50)
+    assert journal.is_done("mail.mbox", 250, 40)
+    journal.record("mail.mbox", 150, 50, [], 0)
+    journal.close()
+
+    journal = ExtractionJournal(path)
+    try:
+        assert journal.is_done("mail.mbox", 150, 50)
+        assert len(journal) == 3
+    finally:
+        journal.close()
+
+def test_memory_does_not_grow_with_messages(tmp_path):
+    journal = ExtractionJournal(str(tmp_path / "journal.jsonl"), sync_every=10 ** 9)
+    source = os.path.join(str(tmp_path), "a" * 40, "mail.mbox")
+    try:
+        journal.record(source, 0, 100, [], 0)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(1, 20001):
+            journal.record(source, i * 100, 100, ["file.pdf"], i)
+        growth = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+    finally:
+        journal.close()
+    # A set of spans took about 268 bytes per message (over 5 MB here)
+    assert growth < 64 * 1024
@@ -0,0 +1,10 @@
+"""
+Tests for the filename_pattern.py port of content.js.
+
+    python -m pytest -q test_filename_pattern.py
+"""
+from filename_pattern import check_golden
+
+def test_matches_content_js_golden_outputs():
+    # Each mismatch is (golden case, Python output)
+    assert check_golden() == []
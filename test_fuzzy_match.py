@@ -0,0 +1,10 @@
+"""
+Tests for the fuzzy_match.py port of background.js.
+
+    python -m pytest -q test_fuzzy_match.py
+"""
+from fuzzy_match import check_golden
+
+def test_matches_background_js_golden_scores():
+    # Each mismatch is (golden case, Python result)
+    assert check_golden() == []